@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+import atexit
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+
+
+class ArtifactCache:
+    """
+    Content-addressed on-disk cache for immutable Gmail payloads
+    (full messages, attachment bytes).
+
+    Blobs live under objects/<aa>/<sha256>; index.json maps cache keys
+    (e.g. "attachment/me/<msg id>/<part id>") to their digest, size and last
+    use. When the stored blobs exceed max_bytes, least recently used keys are
+    evicted first. The index is kept in memory and written every
+    FLUSH_INTERVAL seconds and at exit, not on every put; blob reads, writes
+    and hashing run outside the lock so download threads don't serialize.
+    """
+
+    # Seconds between index.json rewrites while storing; the rest is flushed at exit.
+    FLUSH_INTERVAL = 30.0
+
+    def __init__(self, root: Union[Path, str], max_bytes: int = 512 * 1024 * 1024):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._objects = self.root / "objects"
+        self._index_path = self.root / "index.json"
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        # Kept in least-recently-used-first order (entries move to the end on use).
+        self._index: Dict[str, Dict[str, Any]] = {}
+        if self._index_path.exists():
+            try:
+                index = json.loads(self._index_path.read_text(encoding="utf-8")) or {}
+                self._index = dict(sorted(index.items(), key=lambda kv: kv[1]["used"]))
+            except (OSError, ValueError) as e:
+                print(f"Warning: ignoring unreadable cache index {self._index_path}: {e}", file=sys.stderr)
+        # Keys per blob and bytes stored, so put() and eviction don't scan the index.
+        self._refs: Dict[str, int] = {}
+        self._stored = 0
+        for entry in self._index.values():
+            self._add_ref(entry)
+        atexit.register(self.flush)
+
+    # ---------- bytes ----------
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._index.get(key)
+        if entry is None:
+            return None
+        # Blob I/O and hashing happen outside the lock; blobs are immutable.
+        digest = entry["sha256"]
+        try:
+            data: Optional[bytes] = self._blob_path(digest).read_bytes()
+        except OSError:
+            data = None
+        ok = data is not None and hashlib.sha256(data).hexdigest() == digest
+        unlink: List[Path] = []
+        with self._lock:
+            current = self._index.get(key)
+            if current is None or current["sha256"] != digest:
+                return data if ok else None
+            if not ok:
+                # Missing or corrupted blob: forget it and treat as a miss.
+                unlink = self._drop(key)
+            else:
+                current["used"] = time.time()
+                self._index[key] = self._index.pop(key)
+            self._dirty = True
+        self._unlink(unlink)
+        return data if ok else None
+
+    def put(self, key: str, data: bytes) -> str:
+        """Store `data` under `key` and return its sha256 digest."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+        with self._lock:
+            if key in self._index:
+                unlink = self._drop(key)
+                # The old blob may be this one; it is still wanted.
+                unlink = [p for p in unlink if p != path]
+            else:
+                unlink = []
+            entry = {"sha256": digest, "size": len(data), "used": time.time()}
+            self._index[key] = entry
+            self._add_ref(entry)
+            unlink += self._evict()
+            self._dirty = True
+            if time.monotonic() - self._saved_at >= self.FLUSH_INTERVAL:
+                self._save_index()
+        self._unlink(unlink)
+        return digest
+
+    # ---------- JSON ----------
+
+    def get_json(self, key: str) -> Optional[Any]:
+        data = self.get(key)
+        return json.loads(data.decode("utf-8")) if data is not None else None
+
+    def put_json(self, key: str, obj: Any) -> str:
+        return self.put(key, json.dumps(obj, ensure_ascii=False).encode("utf-8"))
+
+    # ---------- internals ----------
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._dirty:
+                self._save_index()
+
+    def _blob_path(self, digest: str) -> Path:
+        return self._objects / digest[:2] / digest
+
+    def _add_ref(self, entry: Dict[str, Any]) -> None:
+        # Blobs shared by several keys are only stored (and counted) once.
+        digest = entry["sha256"]
+        if digest not in self._refs:
+            self._refs[digest] = 0
+            self._stored += entry["size"]
+        self._refs[digest] += 1
+
+    def _evict(self) -> List[Path]:
+        """Drop least recently used keys until under max_bytes; returns blobs to delete."""
+        unlink: List[Path] = []
+        while self._stored > self.max_bytes and self._index:
+            unlink += self._drop(next(iter(self._index)))
+        return unlink
+
+    def _drop(self, key: str) -> List[Path]:
+        """Remove `key`; returns its blob path if no other key shares it (to delete outside the lock)."""
+        entry = self._index.pop(key)
+        digest = entry["sha256"]
+        self._refs[digest] -= 1
+        if self._refs[digest]:
+            return []
+        del self._refs[digest]
+        self._stored -= entry["size"]
+        return [self._blob_path(digest)]
+
+    @staticmethod
+    def _unlink(paths: List[Path]) -> None:
+        for path in paths:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    def _save_index(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self._index_path.with_name("index.json.tmp")
+        tmp.write_text(json.dumps(self._index), encoding="utf-8")
+        os.replace(tmp, self._index_path)
+        self._dirty = False
+        self._saved_at = time.monotonic()
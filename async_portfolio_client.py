@@ -0,0 +1,322 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import json
+
+import aiohttp
+
+from portfolio_client import (
+    PortfolioClient,
+    PortfolioIdCache,
+    PortfolioNotFoundError,
+    UploadShapeCache,
+    UploadUnavailableError,
+)
+
+
+class AsyncPortfolioClient:
+    """
+    asyncio counterpart of PortfolioClient for pushing several portfolios
+    and chunks concurrently without threads.
+
+    Same endpoints, payload-shape negotiation, chunk bisection and caches as
+    PortfolioClient, on one pooled keep-alive aiohttp session. At most
+    `max_in_flight` requests run at once across all callers. Retries follow
+    PortfolioClient: GETs (and transaction upserts with retry_upserts) are
+    retried with exponential backoff on connection errors and
+    429/502/503/504 responses; other POSTs only when the connection failed.
+
+        async with AsyncPortfolioClient(base) as client:
+            pid = await client.resolve_portfolio_id("Schwab")
+            await client.upsert_transactions(pid, records)
+    """
+
+    BULK_SHAPES = PortfolioClient.BULK_SHAPES
+    RETRY_STATUSES = PortfolioClient.RETRY_STATUSES
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout: int = 20,
+        pool_size: int = 10,
+        max_in_flight: int = 4,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        chunk_size: Optional[int] = None,
+        shape_cache: Optional[UploadShapeCache] = None,
+        id_cache: Optional[PortfolioIdCache] = None,
+        retry_upserts: bool = False,
+    ):
+        self.base = base_url.rstrip("/")
+        self.timeout = timeout
+        self.pool_size = max(pool_size, max_in_flight)
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        # Only safe when the server deduplicates transaction upserts.
+        self.retry_upserts = retry_upserts
+        self.chunk_size = chunk_size
+        self.shape_cache = shape_cache or UploadShapeCache()
+        self.id_cache = id_cache or PortfolioIdCache()
+        # Created on first use, inside the running event loop
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def __aenter__(self) -> "AsyncPortfolioClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    # ---------- portfolios ----------
+
+    async def list_portfolios(self) -> List[Dict[str, Any]]:
+        _, data, _ = await self._request("GET", f"{self.base}/portfolios", raise_for_status=True)
+        if isinstance(data, list):
+            return data
+        if isinstance(data, dict):
+            for key in ("items", "data", "portfolios"):
+                if key in data and isinstance(data[key], list):
+                    return data[key]
+        return []
+
+    async def create_portfolio(self, name: str) -> Dict[str, Any]:
+        _, data, _ = await self._request("POST", f"{self.base}/portfolios", {"name": name}, raise_for_status=True)
+        return data
+
+    async def get_or_create_portfolio(self, name: str) -> Dict[str, Any]:
+        for p in await self.list_portfolios():
+            if p.get("name") == name:
+                return p
+        return await self.create_portfolio(name)
+
+    async def resolve_portfolio_id(self, name: str) -> str:
+        """See PortfolioClient.resolve_portfolio_id."""
+        key = f"{self.base} {name}"
+        portfolio_id = self.id_cache.get(key)
+        if portfolio_id:
+            return portfolio_id
+
+        portfolio = await self.get_or_create_portfolio(name)
+        portfolio_id = (
+            portfolio.get("id")
+            or portfolio.get("portfolio_id")
+            or portfolio.get("data", {}).get("id")
+        )
+        if not portfolio_id:
+            raise RuntimeError(f"Unable to determine portfolio id from response: {portfolio}")
+        portfolio_id = str(portfolio_id)
+        self.id_cache.set(key, portfolio_id)
+        return portfolio_id
+
+    def forget_portfolio_id(self, name: str) -> None:
+        self.id_cache.forget(f"{self.base} {name}")
+
+    # ---------- transactions ----------
+
+    async def upsert_transactions(
+        self,
+        portfolio_id: str,
+        transactions: List[Dict[str, Any]],
+        reprobe: bool = False,
+    ) -> Dict[str, Any]:
+        """See PortfolioClient.upsert_transactions; chunks are sent with asyncio.gather."""
+        url = f"{self.base}/portfolios/{portfolio_id}/transactions"
+
+        known = None if reprobe else self.shape_cache.get(self.base)
+        if known == "single":
+            return await self._upsert_single_mode(url, transactions)
+        if self.chunk_size and len(transactions) > self.chunk_size:
+            return await self._upsert_chunked(url, transactions, known)
+        if known in self.BULK_SHAPES:
+            ok, value = await self._post_bulk(url, transactions, known)
+            if ok:
+                return value
+            if not PortfolioClient._rejected(value):
+                return PortfolioClient._unavailable_summary(transactions, value)
+
+        try:
+            probe = await self._probe_shape(url, transactions, tried=known)
+        except UploadUnavailableError as e:
+            return PortfolioClient._unavailable_summary(transactions, e.failure)
+        if probe is None:
+            return await self._upsert_single_mode(url, transactions, probing=True)
+        shape, value, index = probe
+        self.shape_cache.set(self.base, shape)
+        if index is None:
+            return value
+        rest = transactions[:index] + transactions[index + 1:]
+        results, errors = await self._send_chunk(url, rest, shape)
+        return PortfolioClient._chunked_summary(transactions, shape, 1, [value] + results, errors)
+
+    async def _upsert_chunked(
+        self,
+        url: str,
+        transactions: List[Dict[str, Any]],
+        shape: Optional[str],
+    ) -> Dict[str, Any]:
+        chunks = [transactions[i:i + self.chunk_size] for i in range(0, len(transactions), self.chunk_size)]
+        results: List[Any] = []
+        errors: List[Dict[str, Any]] = []
+
+        pending = chunks
+        if shape not in self.BULK_SHAPES:
+            try:
+                probe = await self._probe_shape(url, chunks[0])
+            except UploadUnavailableError as e:
+                return PortfolioClient._unavailable_summary(transactions, e.failure)
+            if probe is None:
+                return await self._upsert_single_mode(url, transactions, probing=True)
+            shape, value, index = probe
+            self.shape_cache.set(self.base, shape)
+            results.append(value)
+            rest = chunks[0][:index] + chunks[0][index + 1:] if index is not None else []
+            pending = ([rest] if rest else []) + chunks[1:]
+
+        outcomes = await asyncio.gather(*(self._send_chunk(url, c, shape) for c in pending))
+        for chunk_results, chunk_errors in outcomes:
+            results.extend(chunk_results)
+            errors.extend(chunk_errors)
+        if not results and all(PortfolioClient._rejected(e) for e in errors):
+            self.shape_cache.forget(self.base)
+        return PortfolioClient._chunked_summary(transactions, shape, len(chunks), results, errors)
+
+    async def _probe_shape(
+        self,
+        url: str,
+        chunk: List[Dict[str, Any]],
+        tried: Optional[str] = None,
+    ) -> Optional[Tuple[str, Any, Optional[int]]]:
+        """See PortfolioClient._probe_shape."""
+        shapes = sorted(self.BULK_SHAPES, key=lambda s: s != tried)
+        for shape in shapes:
+            if shape == tried:
+                continue
+            ok, value = await self._post_bulk(url, chunk, shape)
+            if ok:
+                return shape, value, None
+            PortfolioClient._check_rejected(value)
+        for index in range(min(3, len(chunk)) if len(chunk) > 1 else 0):
+            for shape in shapes:
+                ok, value = await self._post_bulk(url, [chunk[index]], shape)
+                if ok:
+                    return shape, value, index
+                PortfolioClient._check_rejected(value)
+        return None
+
+    async def _send_chunk(
+        self,
+        url: str,
+        chunk: List[Dict[str, Any]],
+        shape: str,
+    ) -> Tuple[List[Any], List[Dict[str, Any]]]:
+        """See PortfolioClient._send_chunk."""
+        ok, value = await self._post_bulk(url, chunk, shape)
+        if ok:
+            return [value], []
+        if len(chunk) == 1 or not PortfolioClient._rejected(value):
+            return [], [dict(value, transaction=t) for t in chunk]
+        mid = len(chunk) // 2
+        (left_results, left_errors), (right_results, right_errors) = await asyncio.gather(
+            self._send_chunk(url, chunk[:mid], shape),
+            self._send_chunk(url, chunk[mid:], shape),
+        )
+        return left_results + right_results, left_errors + right_errors
+
+    async def _upsert_single_mode(
+        self,
+        url: str,
+        transactions: List[Dict[str, Any]],
+        probing: bool = False,
+    ) -> Dict[str, Any]:
+        outcomes = await asyncio.gather(*(self._post(url, t) for t in transactions))
+        results = [value for ok, value in outcomes if ok]
+        errors = [dict(value, transaction=t) for t, (ok, value) in zip(transactions, outcomes) if not ok]
+        if probing and results:
+            self.shape_cache.set(self.base, "single")
+        elif not probing and transactions and not results and all(PortfolioClient._rejected(e) for e in errors):
+            self.shape_cache.forget(self.base)
+        return {
+            "mode": "per-item-fallback",
+            "submitted": len(transactions),
+            "succeeded": len(results),
+            "failed": len(errors),
+            "sample_results": results[:10],
+            "sample_errors": errors[:10],
+            "failed_indices": PortfolioClient._failed_indices(transactions, errors),
+        }
+
+    async def _post_bulk(self, url: str, transactions: List[Dict[str, Any]], shape: str) -> Tuple[bool, Any]:
+        body = {"transactions": transactions} if shape == "wrapped" else transactions
+        return await self._post(url, body)
+
+    async def _post(self, url: str, body: Any) -> Tuple[bool, Any]:
+        """See PortfolioClient._post."""
+        try:
+            status, data, text = await self._request("POST", url, body, retry=self.retry_upserts)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as ex:
+            return False, {"error": str(ex)[:300] or type(ex).__name__}
+        if status == 404:
+            raise PortfolioNotFoundError(f"{url}: {text[:300]}")
+        if status >= 400:
+            return False, {"status": status, "text": text[:300]}
+        return True, data if data is not None else {"status": status}
+
+    # ---------- HTTP ----------
+
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        body: Any = None,
+        raise_for_status: bool = False,
+        retry: Optional[bool] = None,
+    ) -> Tuple[int, Any, str]:
+        """
+        One request within the in-flight limit. Returns (status, parsed JSON
+        or None, text). With `retry` (default: for GETs only), connection
+        errors and retryable statuses are retried; otherwise only failed
+        connects are, as nothing was sent.
+        """
+        if retry is None:
+            retry = method == "GET"
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+
+        attempt = 0
+        while True:
+            try:
+                async with self._slots:
+                    async with self._session.request(method, url, json=body) as r:
+                        text = await r.text()
+                        status = r.status
+                        if raise_for_status and status >= 400 and status not in self.RETRY_STATUSES:
+                            r.raise_for_status()
+                if status not in self.RETRY_STATUSES or not retry or attempt >= self.max_retries:
+                    break
+            except aiohttp.ClientConnectorError:
+                if attempt >= self.max_retries:
+                    raise
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if not retry or attempt >= self.max_retries:
+                    raise
+            await asyncio.sleep(self.backoff_factor * (2 ** attempt))
+            attempt += 1
+
+        if raise_for_status and status >= 400:
+            raise aiohttp.ClientResponseError(r.request_info, r.history, status=status, message=text[:300])
+        try:
+            data = json.loads(text) if text else None
+        except ValueError:
+            data = None
+        return status, data, text
@@ -0,0 +1,314 @@
+"""
+Gmail response sizes per call site, with and without GmailHelper's field masks.
+
+Each call site's mask is applied to recorded full responses the way Gmail
+evaluates the `fields` parameter, and the JSON sizes are compared. Fixtures
+are read from --fixtures DIR, one response per file under a directory named
+after the API method:
+
+    DIR/messages.list/*.json          DIR/messages.get.full/*.json
+    DIR/users.getProfile/*.json       DIR/messages.get.raw/*.json
+    DIR/users.history.list/*.json     DIR/messages.attachments.get/*.json
+
+(responses to requests without a `fields` parameter, e.g. from the API
+Explorer). Without --fixtures, responses shaped like real ones (headers,
+snippets, labels, size estimates) are built from the synthetic corpus;
+--save-fixtures DIR keeps them for later runs.
+
+    python benchmarks/field_mask_sizes.py --messages 20 --save-fixtures fixtures
+"""
+from __future__ import annotations
+
+from email.message import EmailMessage
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import argparse
+import json
+import random
+import sys
+import tempfile
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from gmail_helper import GmailHelper  # noqa: E402
+from synthetic import _b64, write_corpus  # noqa: E402
+
+# call site -> (fixture kind, mask)
+CALL_SITES = {
+    "search_messages": ("messages.list", GmailHelper.LIST_FIELDS),
+    "get_history_id": ("users.getProfile", GmailHelper.PROFILE_FIELDS),
+    "list_added_message_ids": ("users.history.list", GmailHelper.HISTORY_FIELDS),
+    "download part index": ("messages.get.full", GmailHelper.PART_INDEX_FIELDS),
+    "message bodies (Schwab, inline PDFs)": ("messages.get.full", GmailHelper.BODY_FIELDS),
+    "raw message (Schwab fallback)": ("messages.get.raw", GmailHelper.RAW_FIELDS),
+    "get_attachment_bytes": ("messages.attachments.get", GmailHelper.ATTACHMENT_FIELDS),
+}
+
+
+# ---------- partial response ----------
+
+def parse_fields(mask: str) -> Dict[str, Any]:
+    """
+    Parse a `fields` mask into a selection tree: {name: subtree}, where a
+    None subtree selects the whole value. Supports the syntax Gmail does:
+    comma lists, a/b paths and a(b,c) sub-selections.
+    """
+    pos = 0
+
+    def merge(tree: Dict[str, Any], path: List[str], sub: Optional[Dict[str, Any]]) -> None:
+        head, rest = path[0], path[1:]
+        if rest:
+            if head in tree and tree[head] is None:
+                return
+            merge(tree.setdefault(head, {}), rest, sub)
+        elif sub is None or tree.get(head, {}) is None:
+            tree[head] = None
+        elif head in tree:
+            for name, child in sub.items():
+                merge(tree[head], [name], child)
+        else:
+            tree[head] = sub
+
+    def selection() -> Dict[str, Any]:
+        nonlocal pos
+        tree: Dict[str, Any] = {}
+        while True:
+            start = pos
+            while pos < len(mask) and mask[pos] not in ",()":
+                pos += 1
+            path = mask[start:pos].strip().split("/")
+            if not all(path):
+                raise ValueError(f"bad fields mask at {start}: {mask!r}")
+            sub = None
+            if pos < len(mask) and mask[pos] == "(":
+                pos += 1
+                sub = selection()
+                if pos >= len(mask) or mask[pos] != ")":
+                    raise ValueError(f"unbalanced parentheses in fields mask: {mask!r}")
+                pos += 1
+            merge(tree, path, sub)
+            if pos < len(mask) and mask[pos] == ",":
+                pos += 1
+                continue
+            return tree
+
+    tree = selection()
+    if pos != len(mask):
+        raise ValueError(f"bad fields mask at {pos}: {mask!r}")
+    return tree
+
+
+def apply_fields(value: Any, tree: Optional[Dict[str, Any]]) -> Any:
+    """Keep only what `tree` selects; lists are filtered element by element."""
+    if tree is None:
+        return value
+    if isinstance(value, list):
+        return [apply_fields(v, tree) for v in value]
+    if not isinstance(value, dict):
+        return value
+    out = {}
+    for name, sub in tree.items():
+        if name in value:
+            picked = apply_fields(value[name], sub)
+            if picked != {}:  # Gmail leaves out objects with nothing selected
+                out[name] = picked
+    return out
+
+
+def json_size(value: Any) -> int:
+    return len(json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+# ---------- fixtures ----------
+
+def _token(rng: random.Random, n: int) -> str:
+    alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
+    return "".join(rng.choice(alphabet) for _ in range(n))
+
+
+def _headers(rng: random.Random, sender: str, subject: str) -> List[Dict[str, str]]:
+    """A top-level header list the size of a typical notification mail's."""
+    received = [
+        {"name": "Received", "value": f"from mail{i}.example.net (mail{i}.example.net. [203.0.113.{i}]) by "
+                                      f"mx.google.com with ESMTPS id {_token(rng, 24)} for <me@example.com> "
+                                      f"(version=TLS1_3 cipher=TLS_AES_256_GCM_SHA384 bits=256/256); "
+                                      f"Thu, 02 Jan 2025 09:0{i}:00 -0800 (PST)"}
+        for i in range(4)
+    ]
+    return [
+        {"name": "Delivered-To", "value": "me@example.com"},
+        *received,
+        {"name": "X-Google-Smtp-Source", "value": _token(rng, 88)},
+        {"name": "X-Received", "value": f"by 2002:a17:90b:{_token(rng, 4)} with SMTP id {_token(rng, 40)}"},
+        {"name": "ARC-Seal", "value": f"i=1; a=rsa-sha256; t=1735837200; cv=none; d=google.com; s=arc-20240605; b={_token(rng, 340)}"},
+        {"name": "ARC-Message-Signature", "value": f"i=1; a=rsa-sha256; c=relaxed/relaxed; d=google.com; s=arc-20240605; "
+                                                   f"h=subject:to:from:date:message-id:mime-version; bh={_token(rng, 44)}; b={_token(rng, 340)}"},
+        {"name": "ARC-Authentication-Results", "value": f"i=1; mx.google.com; dkim=pass header.i=@example.net; spf=pass smtp.mailfrom={sender}"},
+        {"name": "Return-Path", "value": f"<{sender}>"},
+        {"name": "Authentication-Results", "value": f"mx.google.com; dkim=pass header.i=@example.net header.s=s1; "
+                                                    f"spf=pass (google.com: domain of {sender} designates 203.0.113.1 as permitted sender) "
+                                                    f"smtp.mailfrom={sender}; dmarc=pass (p=REJECT sp=REJECT dis=NONE)"},
+        {"name": "DKIM-Signature", "value": f"v=1; a=rsa-sha256; c=relaxed/relaxed; d=example.net; s=s1; "
+                                            f"h=From:To:Subject:Date:Message-ID:MIME-Version:Content-Type; bh={_token(rng, 44)}; b={_token(rng, 344)}"},
+        {"name": "MIME-Version", "value": "1.0"},
+        {"name": "From", "value": sender},
+        {"name": "To", "value": "me@example.com"},
+        {"name": "Subject", "value": subject},
+        {"name": "Date", "value": "Thu, 02 Jan 2025 17:00:00 +0000"},
+        {"name": "Message-ID", "value": f"<{_token(rng, 32)}@example.net>"},
+        {"name": "Content-Type", "value": f'multipart/mixed; boundary="{_token(rng, 28)}"'},
+    ]
+
+
+def _text_part(part_id: str, mime: str, data: bytes) -> Dict[str, Any]:
+    return {
+        "partId": part_id, "mimeType": mime, "filename": "",
+        "headers": [{"name": "Content-Type", "value": f'{mime}; charset="UTF-8"'},
+                    {"name": "Content-Transfer-Encoding", "value": "base64"}],
+        "body": {"size": len(data), "data": _b64(data)},
+    }
+
+
+def _file_part(rng: random.Random, part_id: str, mime: str, name: str, size: int) -> Dict[str, Any]:
+    return {
+        "partId": part_id, "mimeType": mime, "filename": name,
+        "headers": [{"name": "Content-Type", "value": f'{mime}; name="{name}"'},
+                    {"name": "Content-Disposition", "value": f'attachment; filename="{name}"'},
+                    {"name": "Content-Transfer-Encoding", "value": "base64"},
+                    {"name": "X-Attachment-Id", "value": _token(rng, 16)}],
+        "body": {"attachmentId": _token(rng, 390), "size": size},
+    }
+
+
+def _envelope(rng: random.Random, mid: str, snippet: str, size: int) -> Dict[str, Any]:
+    return {
+        "id": mid, "threadId": mid,
+        "labelIds": ["IMPORTANT", "CATEGORY_UPDATES", "INBOX", f"Label_{rng.randrange(10 ** 18)}"],
+        "snippet": snippet[:200],
+        "sizeEstimate": size,
+        "historyId": str(rng.randrange(10 ** 6, 10 ** 7)),
+        "internalDate": str(1735837200000 + rng.randrange(10 ** 9)),
+    }
+
+
+def build_fixtures(messages: int, seed: int = 0) -> Dict[str, List[Any]]:
+    """Full responses for every call site, from a synthetic corpus of `messages` per source."""
+    rng = random.Random(seed)
+    fixtures: Dict[str, List[Any]] = {kind: [] for kind, _ in CALL_SITES.values()}
+    notice = ("<html><body>" + "<p>本郵件為系統自動發送，請勿直接回覆。對帳單如附件，請以身分證字號開啟。</p>" * 40
+              + "</body></html>").encode("utf-8")
+
+    with tempfile.TemporaryDirectory(prefix="field_masks_") as tmp:
+        corpus = Path(tmp)
+        write_corpus(corpus, messages, pages=2, trades_per_page=20)
+        ids = []
+        for path in sorted(corpus.glob("*/*")):
+            mid = f"{rng.randrange(16 ** 16):016x}"
+            ids.append(mid)
+            data = path.read_bytes()
+            if path.suffix == ".pdf":
+                sender, subject = "service@example.net", path.stem
+                parts = [
+                    {"partId": "0", "mimeType": "multipart/alternative", "filename": "",
+                     "headers": [{"name": "Content-Type", "value": "multipart/alternative"}],
+                     "body": {"size": 0},
+                     "parts": [_text_part("0.0", "text/plain", notice[:1500]), _text_part("0.1", "text/html", notice)]},
+                    _file_part(rng, "1", "application/pdf", path.name, len(data)),
+                    _file_part(rng, "2", "application/pkcs7-signature", "smime.p7s", 5000),
+                ]
+                attachment = {"attachmentId": parts[1]["body"]["attachmentId"], "size": len(data), "data": _b64(data)}
+                fixtures["messages.attachments.get"].append(attachment)
+                snippet = notice.decode("utf-8")
+            else:
+                sender, subject = "donotreply@mail.schwab.com", "eConfirms: Trade Confirmation"
+                parts = [_text_part("0", "text/html", data)]
+                snippet = "Your trade confirmation Symbol: ..."
+            headers = _headers(rng, sender, subject)
+            size = len(data) * 4 // 3 + 8000
+            full = dict(_envelope(rng, mid, snippet, size), payload={
+                "partId": "", "mimeType": "multipart/mixed", "filename": "",
+                "headers": headers, "body": {"size": 0}, "parts": parts,
+            })
+            fixtures["messages.get.full"].append(full)
+
+            eml = EmailMessage()
+            for h in headers:
+                if h["name"] not in ("Content-Type", "MIME-Version"):
+                    eml[h["name"]] = h["value"]
+            eml.set_content(notice.decode("utf-8") if path.suffix == ".pdf" else data.decode("utf-8"), subtype="html")
+            fixtures["messages.get.raw"].append(dict(_envelope(rng, mid, snippet, size), raw=_b64(eml.as_bytes())))
+
+    for start in range(0, len(ids), 100):
+        page = {"messages": [{"id": m, "threadId": m} for m in ids[start:start + 100]],
+                "resultSizeEstimate": len(ids[start:start + 100])}
+        if start + 100 < len(ids):
+            page["nextPageToken"] = str(rng.randrange(10 ** 19))
+        fixtures["messages.list"].append(page)
+    fixtures["users.getProfile"].append({"emailAddress": "me@example.com", "messagesTotal": 48213,
+                                         "threadsTotal": 30117, "historyId": "9876543"})
+    fixtures["users.history.list"].append({
+        "history": [{"id": str(9876000 + i), "messages": [{"id": m, "threadId": m}],
+                     "messagesAdded": [{"message": {"id": m, "threadId": m, "labelIds": ["UNREAD", "INBOX"]}}]}
+                    for i, m in enumerate(ids)],
+        "historyId": "9876543",
+    })
+    return fixtures
+
+
+def load_fixtures(directory: Path) -> Dict[str, List[Any]]:
+    fixtures: Dict[str, List[Any]] = {}
+    for kind, _ in CALL_SITES.values():
+        fixtures[kind] = [json.loads(p.read_text(encoding="utf-8")) for p in sorted((directory / kind).glob("*.json"))]
+    return fixtures
+
+
+def save_fixtures(fixtures: Dict[str, List[Any]], directory: Path) -> None:
+    for kind, responses in fixtures.items():
+        (directory / kind).mkdir(parents=True, exist_ok=True)
+        for i, resp in enumerate(responses):
+            (directory / kind / f"{i:04d}.json").write_text(json.dumps(resp, ensure_ascii=False), encoding="utf-8")
+
+
+# ---------- report ----------
+
+def measure(fixtures: Dict[str, List[Any]]) -> Dict[str, Any]:
+    results = {}
+    for site, (kind, mask) in CALL_SITES.items():
+        tree = parse_fields(mask)
+        responses = fixtures.get(kind, [])
+        full = sum(json_size(r) for r in responses)
+        masked = sum(json_size(apply_fields(r, tree)) for r in responses)
+        results[site] = {
+            "fixture": kind,
+            "fields": mask,
+            "responses": len(responses),
+            "full_bytes": full,
+            "masked_bytes": masked,
+            "reduction_pct": round(100 * (1 - masked / full), 1) if full else None,
+        }
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--fixtures", type=Path, default=None, help="Directory of recorded full responses (see above).")
+    ap.add_argument("--messages", type=int, default=10, help="Synthetic messages per source when --fixtures isn't given.")
+    ap.add_argument("--save-fixtures", type=Path, default=None, help="Write the synthetic responses here.")
+    args = ap.parse_args()
+
+    if args.fixtures:
+        fixtures = load_fixtures(args.fixtures)
+    else:
+        fixtures = build_fixtures(args.messages)
+        if args.save_fixtures:
+            save_fixtures(fixtures, args.save_fixtures)
+
+    print(json.dumps({
+        "fixtures": str(args.fixtures) if args.fixtures else f"synthetic ({args.messages} messages per source)",
+        "call_sites": measure(fixtures),
+    }, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Import cost of the CLI per scenario, from `python -X importtime`.
+
+Each scenario imports what a run of that kind loads before doing any work
+(the CLI module plus the selected parser modules / API client). Pass
+--baseline REV to measure another git revision the same way (exported with
+`git archive` to a temp dir) for a before/after comparison.
+
+    python benchmarks/import_time.py --runs 7 --baseline HEAD~1
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Dict, List, Set, Tuple
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+
+ROOT = Path(__file__).resolve().parent.parent
+
+SCENARIOS = {
+    # `main.py --help`, or any run before a source is picked
+    "cli": "import main",
+    "source_schwab": "import main, schwab_trade_parser",
+    "source_cathay_us": "import main, cathay_us_trade_parser",
+    # Gmail client libraries (loaded when the Gmail service is first built)
+    "gmail_helper": "import main, gmail_helper",
+    "all_sources_push": "import main, cathay_us_trade_parser, cathay_tw_trade_parser, "
+                        "schwab_trade_parser, portfolio_client",
+}
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int]]:
+    """(module, cumulative microseconds) for every top-level import."""
+    out = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if name.startswith("  "):  # nested: already counted in its parent
+            continue
+        out.append((name.strip(), int(cumulative)))
+    return out
+
+
+def run_once(tree: Path, code: str) -> Tuple[float, List[Tuple[str, int]]]:
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=tree,
+                          capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"{code!r} failed in {tree}:\n{proc.stderr[-2000:]}")
+    return wall, parse_importtime(proc.stderr)
+
+
+def measure_tree(tree: Path, runs: int) -> Dict[str, Any]:
+    # Modules the interpreter imports at startup anyway (site, encodings, ...)
+    startup: Set[str] = {name for name, _ in run_once(tree, "pass")[1]}
+    results = {}
+    for scenario, code in SCENARIOS.items():
+        walls, totals, top = [], [], []
+        for _ in range(runs):
+            wall, imports = run_once(tree, code)
+            imports = [(n, us) for n, us in imports if n not in startup]
+            walls.append(wall)
+            totals.append(sum(us for _, us in imports))
+            top = imports
+        results[scenario] = {
+            "wall_ms": round(statistics.median(walls) * 1000, 1),
+            "import_ms": round(statistics.median(totals) / 1000, 1),
+            "top_level_imports": len(top),
+            "slowest": [
+                {"module": n, "ms": round(us / 1000, 1)}
+                for n, us in sorted(top, key=lambda x: -x[1])[:5]
+            ],
+        }
+    return results
+
+
+def export_revision(rev: str, dest: Path) -> Path:
+    archive = dest / "src.tar"
+    with open(archive, "wb") as f:
+        subprocess.run(["git", "archive", rev], cwd=ROOT, stdout=f, check=True)
+    with tarfile.open(archive) as tar:
+        tar.extractall(dest / "tree")
+    return dest / "tree"
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--runs", type=int, default=5, help="Runs per scenario; medians are reported.")
+    ap.add_argument("--baseline", default=None, help="Git revision to compare against (e.g. HEAD~1).")
+    args = ap.parse_args()
+
+    report: Dict[str, Any] = {
+        "python": sys.version.split()[0],
+        "runs": args.runs,
+        "current": measure_tree(ROOT, args.runs),
+    }
+    if args.baseline:
+        with tempfile.TemporaryDirectory(prefix="import_time_") as tmp:
+            tree = export_revision(args.baseline, Path(tmp))
+            report["baseline_rev"] = args.baseline
+            report["baseline"] = measure_tree(tree, args.runs)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
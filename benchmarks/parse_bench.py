@@ -0,0 +1,174 @@
+"""
+Throughput and peak memory of the statement parsers on a synthetic corpus.
+
+Measures the hot stages (Cathay TW _extract_lines, Cathay US _cluster_rows
+and _parse_page, Schwab _parse_body) and the full parse() path of each
+parser against FakeGmail, so no network is involved. Prints (or writes) one
+JSON document; keep them around to spot regressions between versions.
+
+    python benchmarks/parse_bench.py --messages 20 --pages 3 --trades-per-page 25 --output bench.json
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Callable, Dict
+import argparse
+import contextlib
+import json
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pdfplumber
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import cathay_tw_trade_parser  # noqa: E402
+import cathay_us_trade_parser  # noqa: E402
+from cathay_tw_trade_parser import CathayTWTradeParser  # noqa: E402
+from cathay_us_trade_parser import CathayUSTradeParser  # noqa: E402
+from schwab_trade_parser import SchwabTradeParser  # noqa: E402
+from synthetic import FakeGmail, write_corpus  # noqa: E402
+
+
+def measure(fn: Callable[[], int], repeat: int) -> Dict[str, Any]:
+    """
+    Run `fn` (which returns how many items it processed) `repeat` times for
+    timing, then once more under tracemalloc for the peak Python heap (of
+    this process only: with --workers > 1 the PDF workers aren't included).
+    """
+    items = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        items += fn()
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "seconds": round(seconds, 4),
+        "items": items,
+        "items_per_sec": round(items / seconds, 1) if seconds else None,
+        "peak_mib": round(peak / 2 ** 20, 2),
+    }
+
+
+def git_revision() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                             capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--messages", type=int, default=10, help="Statements/eConfirms per source.")
+    ap.add_argument("--pages", type=int, default=2, help="Pages per Cathay statement.")
+    ap.add_argument("--trades-per-page", type=int, default=20)
+    ap.add_argument("--schwab-trades", type=int, default=1, help="Trades per Schwab eConfirm.")
+    ap.add_argument("--repeat", type=int, default=3, help="Timed runs per stage.")
+    ap.add_argument("--workers", type=int, default=1, help="PDF worker processes for the full parse() runs.")
+    ap.add_argument("--output", type=Path, default=None, help="Write the JSON here instead of stdout.")
+    args = ap.parse_args()
+
+    tmp = Path(tempfile.mkdtemp(prefix="parse_bench_"))
+    corpus = tmp / "corpus"
+    corpus_stats = write_corpus(corpus, args.messages, args.pages, args.trades_per_page, args.schwab_trades)
+    tw_pdfs = sorted((corpus / "cathay_tw").glob("*.pdf"))
+    us_pdfs = sorted((corpus / "cathay_us").glob("*.pdf"))
+    bodies = [p.read_text(encoding="utf-8") for p in sorted((corpus / "schwab").glob("*.html"))]
+
+    tw = CathayTWTradeParser(gmail=None, save_dir=tmp / "unused")
+    us = CathayUSTradeParser(gmail=None, save_dir=tmp / "unused")
+    schwab = SchwabTradeParser(gmail=None, save_dir=tmp / "unused")
+
+    # _cluster_rows input: the same words _parse_page clusters, extracted once up front.
+    us_words = []
+    for path in us_pdfs:
+        with pdfplumber.open(path) as pdf:
+            for page in pdf.pages:
+                us_words.append(page.extract_words(x_tolerance=1, y_tolerance=1, keep_blank_chars=False,
+                                                   extra_attrs=["size", "fontname"]))
+
+    def tw_extract_lines() -> int:
+        for path in tw_pdfs:
+            tw._extract_lines(path)
+        return len(tw_pdfs) * args.pages
+
+    def us_cluster_rows() -> int:
+        for words in us_words:
+            us._cluster_rows(words, y_tol=2.5)
+        return sum(len(w) for w in us_words)
+
+    def us_parse_page() -> int:
+        pages = 0
+        for path in us_pdfs:
+            with pdfplumber.open(path) as pdf:
+                for page in pdf.pages:
+                    us._parse_page(page)
+                    pages += 1
+        return pages
+
+    def schwab_parse_body() -> int:
+        for body in bodies:
+            schwab._parse_body(body)
+        return len(bodies)
+
+    gmail = FakeGmail(corpus)
+
+    def full_parse(cls, **kwargs) -> Callable[[], int]:
+        def run() -> int:
+            parser = cls(gmail=gmail, save_dir=tmp / "downloads" / cls.__name__, **kwargs)
+            return len(parser.parse())
+        return run
+
+    stages = {
+        "cathay_tw._extract_lines": (tw_extract_lines, "pages"),
+        "cathay_us._cluster_rows": (us_cluster_rows, "words"),
+        "cathay_us._parse_page": (us_parse_page, "pages"),
+        "schwab._parse_body": (schwab_parse_body, "bodies"),
+        "cathay_tw.parse": (full_parse(CathayTWTradeParser, workers=args.workers), "records"),
+        "cathay_us.parse": (full_parse(CathayUSTradeParser, workers=args.workers), "records"),
+        "schwab.parse": (full_parse(SchwabTradeParser), "records"),
+    }
+    results = {}
+    try:
+        # Parser progress messages go to stderr so stdout stays valid JSON.
+        with contextlib.redirect_stdout(sys.stderr):
+            for name, (fn, unit) in stages.items():
+                results[name] = dict(measure(fn, args.repeat), unit=unit)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    report = {
+        "git_revision": git_revision(),
+        "parser_versions": {
+            "cathay_tw": cathay_tw_trade_parser.PARSER_VERSION,
+            "cathay_us": cathay_us_trade_parser.PARSER_VERSION,
+        },
+        "python": platform.python_version(),
+        "pdfplumber": pdfplumber.__version__,
+        "config": {k: v for k, v in vars(args).items() if k != "output"},
+        "corpus": corpus_stats,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Compare PortfolioClient's pooled Session against one connection per call
+(the previous module-level requests.get/post behavior) on a local stand-in
+server, and the JSON bulk upload against the gzip NDJSON stream.
+
+    python benchmarks/portfolio_client_bench.py --records 500 --connect-latency 0.02
+"""
+from __future__ import annotations
+
+from pathlib import Path
+import argparse
+import json
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from portfolio_client import PortfolioClient  # noqa: E402
+from standin_server import StandinServer  # noqa: E402
+
+
+def make_records(n: int):
+    return [
+        {"symbol": f"SYM{i % 50}", "trade_type": "buy", "currency": "USD",
+         "shares": 1 + i % 7, "price": 10.0 + i, "fee": 0.0,
+         "date": "2025/01/02", "total": -(10.0 + i)}
+        for i in range(n)
+    ]
+
+
+def run(session, records, accept, args, stream=False):
+    with StandinServer(accept=accept, latency=args.latency, connect_latency=args.connect_latency) as server:
+        client = PortfolioClient(server.base_url, session=session)
+        start = time.perf_counter()
+        pid = client.get_or_create_portfolio("Bench")["id"]
+        if stream:
+            client.upsert_transactions_stream(pid, iter(records))
+        else:
+            client.upsert_transactions(pid, records)
+        elapsed = time.perf_counter() - start
+        return {
+            "seconds": round(elapsed, 4),
+            "requests": server.requests,
+            "connections": server.connections,
+            "bytes_sent": server.bytes_received,
+        }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--records", type=int, default=300)
+    ap.add_argument("--latency", type=float, default=0.0, help="Server-side delay per request (seconds).")
+    ap.add_argument("--connect-latency", type=float, default=0.0,
+                    help="Delay per new connection (seconds), e.g. 0.02 for a TLS handshake.")
+    args = ap.parse_args()
+
+    records = make_records(args.records)
+    results = {}
+    # "single" only: both bulk shapes fail and every record is POSTed on its own.
+    for scenario, accept in (("bulk", ("wrapped",)), ("per_item_fallback", ("single",))):
+        results[scenario] = {
+            # The requests module itself has .get/.post, i.e. a fresh connection per call.
+            "per_call_connections": run(requests, records, accept, args),
+            "pooled_session": run(None, records, accept, args),
+        }
+    results["upload_body"] = {
+        "json_bulk": run(None, records, ("wrapped",), args),
+        "gzip_ndjson_stream": run(None, records, ("ndjson",), args, stream=True),
+    }
+    print(json.dumps({
+        "records": args.records,
+        "latency": args.latency,
+        "connect_latency": args.connect_latency,
+        "results": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Local stand-in for the portfolio API, used by the benchmarks.
+
+Implements GET/POST /portfolios and POST /portfolios/{id}/transactions.
+`accept` chooses which transaction payload shapes the server takes:
+"wrapped" ({"transactions": [...]}), "list" ([...]), "single" ({...}) and/or
+"ndjson" (gzip-compressed NDJSON, possibly chunked); other shapes get a 400,
+like a strict real server. `latency` delays every
+request; `connect_latency` delays every new connection, standing in for the
+TCP/TLS handshake a real deployment pays. A request containing a record
+whose symbol is in `reject_symbols` is refused as a whole with a 422.
+The first `fail_first` requests are answered with `fail_status` (e.g. a
+503 from an overloaded server) before anything else is done.
+"""
+from __future__ import annotations
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterable, Optional
+import gzip
+import json
+import socket
+import threading
+import time
+
+
+class StandinServer:
+    def __init__(
+        self,
+        accept: Iterable[str] = ("wrapped", "list", "single", "ndjson"),
+        latency: float = 0.0,
+        connect_latency: float = 0.0,
+        reject_symbols: Iterable[str] = (),
+        fail_first: int = 0,
+        fail_status: int = 503,
+    ):
+        self.accept = set(accept)
+        self.latency = latency
+        self.connect_latency = connect_latency
+        self.reject_symbols = set(reject_symbols)
+        self.fail_first = fail_first
+        self.fail_status = fail_status
+        self.failed = 0
+        self.portfolios = []
+        self.transactions = {}
+        self.requests = 0
+        self.bytes_received = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._httpd: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "StandinServer":
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+
+            def setup(self):
+                super().setup()
+                # Headers and body go out in separate writes; avoid Nagle/delayed-ACK stalls.
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                if server.connect_latency:
+                    time.sleep(server.connect_latency)
+                with server._lock:
+                    server.connections += 1
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status, body=None):
+                data = json.dumps(body if body is not None else {}).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _body(self):
+                if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+                    data = b""
+                    while True:
+                        size = int(self.rfile.readline().split(b";")[0], 16)
+                        if size == 0:
+                            self.rfile.readline()
+                            break
+                        data += self.rfile.read(size)
+                        self.rfile.readline()
+                else:
+                    n = int(self.headers.get("Content-Length") or 0)
+                    data = self.rfile.read(n) if n else b""
+                with server._lock:
+                    server.bytes_received += len(data)
+                return data
+
+            def do_GET(self):
+                server._count()
+                if server._take_failure():
+                    return self._reply(server.fail_status, {"error": "try again"})
+                if self.path == "/portfolios":
+                    return self._reply(200, server.portfolios)
+                self._reply(404, {"error": "not found"})
+
+            def do_POST(self):
+                server._count()
+                raw = self._body()
+                if server._take_failure():
+                    return self._reply(server.fail_status, {"error": "try again"})
+                if self.path == "/portfolios":
+                    with server._lock:
+                        p = {"id": str(len(server.portfolios) + 1), "name": json.loads(raw)["name"]}
+                        server.portfolios.append(p)
+                    return self._reply(201, p)
+                parts = self.path.strip("/").split("/")
+                if len(parts) == 3 and parts[0] == "portfolios" and parts[2] == "transactions":
+                    if not any(p["id"] == parts[1] for p in server.portfolios):
+                        return self._reply(404, {"error": "unknown portfolio"})
+                    return server._accept_transactions(self, parts[1], raw, self.headers)
+                self._reply(404, {"error": "not found"})
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _count(self) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.requests += 1
+
+    def _take_failure(self) -> bool:
+        with self._lock:
+            if self.failed < self.fail_first:
+                self.failed += 1
+                return True
+            return False
+
+    def _accept_transactions(self, handler, portfolio_id: str, raw: bytes, headers) -> None:
+        try:
+            if headers.get("Content-Encoding") == "gzip":
+                raw = gzip.decompress(raw)
+            if headers.get("Content-Type", "").startswith("application/x-ndjson"):
+                body = [json.loads(line) for line in raw.splitlines() if line.strip()]
+            else:
+                body = json.loads(raw)
+        except (OSError, ValueError):
+            return handler._reply(400, {"error": "invalid body"})
+        if headers.get("Content-Type", "").startswith("application/x-ndjson"):
+            shape, items = "ndjson", body
+        elif isinstance(body, dict) and isinstance(body.get("transactions"), list):
+            shape, items = "wrapped", body["transactions"]
+        elif isinstance(body, list):
+            shape, items = "list", body
+        else:
+            shape, items = "single", [body]
+        if shape not in self.accept:
+            return handler._reply(400, {"error": f"{shape} payloads not supported"})
+        if any(isinstance(t, dict) and t.get("symbol") in self.reject_symbols for t in items):
+            return handler._reply(422, {"error": "rejected record"})
+        with self._lock:
+            self.transactions.setdefault(portfolio_id, []).extend(items)
+        handler._reply(200, {"upserted": len(items)})
@@ -0,0 +1,325 @@
+"""
+Synthetic statement corpus for the benchmarks: Cathay TW daily statements and
+Cathay US trade reports as PDFs, Schwab eConfirm bodies as HTML, and
+FakeGmail, a stand-in for GmailHelper that serves them as messages.
+
+PDFs are written by a tiny text-only writer (MiniPDF), so no PDF library is
+needed: ASCII words use the standard Helvetica font, everything else an
+Identity-H CID font whose ToUnicode map lets pdfplumber read the CJK text
+back. The layouts only mimic what the parsers look at (row order, labels
+and columns), not the real statements' look.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict, Iterator, List, Sequence, Tuple, Union
+import base64
+import random
+import zlib
+
+PAGE_W, PAGE_H = 595, 842
+FONT_SIZE = 9
+LINE_GAP = 14
+
+TW_STOCKS = [("2330", "台積電"), ("2317", "鴻海"), ("2454", "聯發科"), ("0050", "元大台灣50"),
+             ("2412", "中華電"), ("2881", "富邦金"), ("2882", "國泰金"), ("2303", "聯電")]
+US_STOCKS = [("AAPL", "APPLE INC"), ("MSFT", "MICROSOFT CORP"), ("NVDA", "NVIDIA CORP"),
+             ("VOO", "VANGUARD S&P 500 ETF"), ("TSLA", "TESLA INC"), ("AMZN", "AMAZON COM INC")]
+
+
+class MiniPDF:
+    """Minimal PDF writer: positioned words on A4 pages, nothing else."""
+
+    def __init__(self) -> None:
+        self._pages: List[List[Tuple[float, float, str]]] = []
+        self._cids: set = set()
+
+    def add_page(self, lines: Sequence[str], top: float = 60, left: float = 40) -> None:
+        """
+        Lay out `lines` top to bottom; words within a line are spaced apart.
+        Long pages get a tighter line gap (down to 5pt, still above the
+        parsers' row tolerance) so everything stays on the page.
+        """
+        words: List[Tuple[float, float, str]] = []
+        gap = max(5.0, min(LINE_GAP, (PAGE_H - 2 * top) / max(len(lines), 1)))
+        y = PAGE_H - top
+        for line in lines:
+            x = left
+            for word in line.split():
+                words.append((x, y, word))
+                x += self._width(word) + 8
+                if not word.isascii():
+                    self._cids.update(ord(c) for c in word)
+            y -= gap
+        self._pages.append(words)
+
+    @staticmethod
+    def _width(word: str) -> float:
+        if word.isascii():
+            return FONT_SIZE * 0.6 * len(word)
+        return FONT_SIZE * len(word)  # CID font: DW 1000, every glyph is one em
+
+    @staticmethod
+    def _show(word: str) -> str:
+        if word.isascii():
+            esc = word.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            return f"/F1 {FONT_SIZE} Tf ({esc}) Tj"
+        # Identity-H: two-byte codes, CID == Unicode code point (BMP only).
+        return f"/F2 {FONT_SIZE} Tf <{''.join(f'{ord(c):04X}' for c in word)}> Tj"
+
+    def _to_unicode(self) -> bytes:
+        cids = sorted(self._cids)
+        chunks = []
+        for i in range(0, len(cids), 100):
+            part = cids[i:i + 100]
+            body = "\n".join(f"<{c:04X}> <{c:04X}>" for c in part)
+            chunks.append(f"{len(part)} beginbfchar\n{body}\nendbfchar")
+        return (
+            "/CIDInit /ProcSet findresource begin\n12 dict begin\nbegincmap\n"
+            "/CIDSystemInfo << /Registry (Adobe) /Ordering (UCS) /Supplement 0 >> def\n"
+            "/CMapName /Adobe-Identity-UCS def\n/CMapType 2 def\n"
+            "1 begincodespacerange\n<0000> <FFFF>\nendcodespacerange\n"
+            + "\n".join(chunks)
+            + "\nendcmap\nCMapName currentdict /CMap defineresource pop\nend\nend\n"
+        ).encode("ascii")
+
+    def tobytes(self) -> bytes:
+        objs: List[bytes] = []
+
+        def add(body: Union[str, bytes]) -> int:
+            objs.append(body.encode("latin-1") if isinstance(body, str) else body)
+            return len(objs)
+
+        def stream(data: bytes) -> bytes:
+            data = zlib.compress(data)
+            return b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(data) + data + b"\nendstream"
+
+        # Objects 1-7 are fixed; page and content objects follow.
+        add("<< /Type /Catalog /Pages 2 0 R >>")
+        add("")  # page tree, filled in once the page ids are known
+        add("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+        add("<< /Type /Font /Subtype /Type0 /BaseFont /SynthCJK /Encoding /Identity-H "
+            "/DescendantFonts [6 0 R] /ToUnicode 7 0 R >>")
+        add("<< /Type /FontDescriptor /FontName /SynthCJK /Flags 4 /FontBBox [0 -120 1000 880] "
+            "/ItalicAngle 0 /Ascent 880 /Descent -120 /CapHeight 700 /StemV 80 >>")
+        add("<< /Type /Font /Subtype /CIDFontType2 /BaseFont /SynthCJK "
+            "/CIDSystemInfo << /Registry (Adobe) /Ordering (Identity) /Supplement 0 >> "
+            "/FontDescriptor 5 0 R /DW 1000 /CIDToGIDMap /Identity >>")
+        add(stream(self._to_unicode()))
+
+        kids = []
+        for words in self._pages:
+            ops = "\n".join(f"BT {x:.2f} {y:.2f} Td {self._show(w)} ET" for x, y, w in words)
+            content = add(stream(ops.encode("latin-1")))
+            kids.append(add(
+                f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_W} {PAGE_H}] "
+                f"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents {content} 0 R >>"
+            ))
+        objs[1] = (
+            f"<< /Type /Pages /Kids [{' '.join(f'{k} 0 R' for k in kids)}] /Count {len(kids)} >>"
+        ).encode("latin-1")
+
+        out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        offsets = []
+        for num, body in enumerate(objs, 1):
+            offsets.append(len(out))
+            out += b"%d 0 obj\n" % num + body + b"\nendobj\n"
+        xref = len(out)
+        out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objs) + 1)
+        out += b"".join(b"%010d 00000 n \n" % off for off in offsets)
+        out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objs) + 1, xref)
+        return bytes(out)
+
+
+# ---------- statement generators ----------
+
+def cathay_tw_pdf(pages: int, trades_per_page: int, seed: int = 0) -> Tuple[bytes, int]:
+    """A Cathay TW daily statement; returns (pdf bytes, number of trades)."""
+    rng = random.Random(seed)
+    pdf = MiniPDF()
+    for page in range(pages):
+        lines = ["國泰證券 日對帳單"]
+        if page == 0:
+            lines += ["成交日期 交割日期 帳號", "2025/01/02 2025/01/06 9A95-1234567"]
+        lines.append("股票名稱 交易別 股數 單價 價金 手續費 交易稅 客戶應收付額")
+        for _ in range(trades_per_page):
+            _, name = rng.choice(TW_STOCKS)
+            buy = rng.random() < 0.6
+            shares = rng.randrange(1, 20) * 100
+            price = rng.randrange(2000, 120000) / 100
+            amount = round(shares * price)
+            fee = max(20, round(amount * 0.001425))
+            tax = 0 if buy else round(amount * 0.003)
+            net = -(amount + fee) if buy else amount - fee - tax
+            lines.append(f"{name} {'現股買進' if buy else '現股賣出'} {shares:,} {price:,.2f} {amount:,} {fee:,} {tax:,}")
+            lines.append(f"{net:,}")
+        if page == pages - 1:
+            lines += ["買進總計： 0 0 0 0 0", "代碼 股票名稱 庫存 股數 市值"]
+            lines += [f"{code} {name} 1,000 1,000 100,000" for code, name in TW_STOCKS]
+            lines.append("集保市值總計 800,000")
+        pdf.add_page(lines)
+    return pdf.tobytes(), pages * trades_per_page
+
+
+def cathay_us_pdf(pages: int, trades_per_page: int, seed: int = 0) -> Tuple[bytes, int]:
+    """A Cathay US trade report (客戶買賣報告書); returns (pdf bytes, number of trades)."""
+    rng = random.Random(seed)
+    pdf = MiniPDF()
+    ref = 10000000 + seed * 100000
+    for _ in range(pages):
+        lines = ["國泰證券 客戶買賣報告書", "TradeReference 交易序號 Product 商品 Currency Price"]
+        for _ in range(trades_per_page):
+            ref += 1
+            sym, name = rng.choice(US_STOCKS)
+            buy = rng.random() < 0.6
+            shares = rng.randrange(1, 50)
+            price = rng.randrange(1000, 90000) / 100
+            amount = round(shares * price, 2)
+            fee = round(max(1.0, amount * 0.001), 2)
+            net = -(amount + fee) if buy else amount - fee
+            lines.append(f"{ref} {sym}/{name} USD {price:.2f} {net:,.2f}")
+            lines.append(f"US {'買進' if buy else '賣出'} {shares} {amount:,.2f} {fee:.2f} 2025/01/06")
+            lines.append(f"USD 1.0000 {net:,.2f}")
+        lines += ["", "重要事項 本報告書僅供參考"]
+        pdf.add_page(lines)
+    return pdf.tobytes(), pages * trades_per_page
+
+
+def schwab_html(trades: int, seed: int = 0) -> Tuple[str, int]:
+    """A Schwab eConfirm body; returns (html, number of trades)."""
+    rng = random.Random(seed)
+    blocks = []
+    for _ in range(trades):
+        sym, name = rng.choice(US_STOCKS)
+        buy = rng.random() < 0.6
+        qty = rng.randrange(1, 100)
+        price = rng.randrange(1000, 90000) / 100
+        principal = qty * price
+        fee = 0.0 if buy else 0.02
+        total = principal + fee if buy else principal - fee
+        blocks.append(
+            f"<table><tr><td>Symbol: {sym}</td><td>Security Description: {name}</td></tr>"
+            f"<tr><td>Action: {'Bought' if buy else 'Sold'}</td>"
+            f"<td>Trade Date: 01/02/25</td><td>Settle Date: 01/03/25</td></tr>"
+            f"<tr><th>Quantity</th><th>Price</th><th>Principal</th>"
+            f"<th>Charge and/or Interest</th><th>Total Amount</th></tr>"
+            f"<tr><td>{qty}</td><td>${price:,.2f}</td><td>${principal:,.2f}</td>"
+            f"<td>${fee:,.2f}</td><td>${total:,.2f}</td></tr></table>"
+        )
+    html = "<html><body><p>Your trade confirmation</p>" + "".join(blocks) + "</body></html>"
+    return html, trades
+
+
+# ---------- corpus on disk ----------
+
+def write_corpus(
+    root: Path,
+    messages: int = 10,
+    pages: int = 2,
+    trades_per_page: int = 20,
+    schwab_trades: int = 1,
+) -> Dict[str, Dict[str, int]]:
+    """
+    Write `messages` statements per source under root/{cathay_tw,cathay_us,schwab}
+    using the file names the parsers filter on. Returns {source: {"files", "trades"}}.
+    """
+    stats: Dict[str, Dict[str, int]] = {}
+    gens = {
+        "cathay_tw": lambda i: cathay_tw_pdf(pages, trades_per_page, seed=i),
+        "cathay_us": lambda i: cathay_us_pdf(pages, trades_per_page, seed=i),
+    }
+    names = {"cathay_tw": "國泰證券日對帳單_{i:04d}.pdf", "cathay_us": "客戶買賣報告書_{i:04d}.pdf"}
+    for src, gen in gens.items():
+        (root / src).mkdir(parents=True, exist_ok=True)
+        total = 0
+        for i in range(messages):
+            data, n = gen(i)
+            (root / src / names[src].format(i=i)).write_bytes(data)
+            total += n
+        stats[src] = {"files": messages, "trades": total}
+    (root / "schwab").mkdir(parents=True, exist_ok=True)
+    total = 0
+    for i in range(messages):
+        html, n = schwab_html(schwab_trades, seed=i)
+        (root / "schwab" / f"schwab_{i:04d}.html").write_text(html, encoding="utf-8")
+        total += n
+    stats["schwab"] = {"files": messages, "trades": total}
+    return stats
+
+
+# ---------- fake Gmail ----------
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode("ascii")
+
+
+class FakeGmail:
+    """
+    Serves a write_corpus() tree through the subset of the GmailHelper API the
+    parsers use, without any network access. Every file is one message: PDFs
+    as attachments (inline body data), HTML as a text/html body.
+    """
+
+    def __init__(self, corpus: Path) -> None:
+        self.messages: Dict[str, dict] = {}
+        self._ids_by_source: Dict[str, List[str]] = {}
+        for src_dir in sorted(p for p in Path(corpus).iterdir() if p.is_dir()):
+            ids = []
+            for path in sorted(src_dir.iterdir()):
+                mid = f"{src_dir.name}-{path.stem}"
+                if path.suffix == ".pdf":
+                    part = {"partId": "1", "mimeType": "application/pdf", "filename": path.name,
+                            "body": {"data": _b64(path.read_bytes())}}
+                else:
+                    part = {"partId": "0", "mimeType": "text/html", "filename": "",
+                            "body": {"data": _b64(path.read_bytes())}}
+                self.messages[mid] = {"id": mid, "payload": {"mimeType": "multipart/mixed", "parts": [part]}}
+                ids.append(mid)
+            self._ids_by_source[src_dir.name] = ids
+
+    def _source_for(self, query: str) -> List[str]:
+        if "schwab" in query:
+            return self._ids_by_source.get("schwab", [])
+        if "客戶買賣報告書" in query:
+            return self._ids_by_source.get("cathay_us", [])
+        return self._ids_by_source.get("cathay_tw", []) + self._ids_by_source.get("cathay_us", [])
+
+    def search_messages_incremental(self, user_id, query, sync_state=None, sync_key="", max_results=50):
+        return list(self._source_for(query)), None
+
+    def search_messages(self, user_id, query, max_results=50):
+        return list(self._source_for(query))
+
+    def mask(self, fields):
+        return None  # messages here are already as small as a masked response
+
+    def get_message(self, user_id, msg_id, format="full", fields=None):
+        return self.messages[msg_id]
+
+    def get_messages_batch(self, user_id, msg_ids, format="full", fields=None, failed=None):
+        return [self.messages[m] for m in msg_ids]
+
+    def _iter_message_batches(self, user_id, msg_ids, format="full", fields=None, failed=None):
+        yield self.get_messages_batch(user_id, msg_ids, format, fields)
+
+    def get_attachment_bytes(self, user_id, msg_id, part):
+        return base64.urlsafe_b64decode((part.get("body") or {}).get("data", ""))
+
+    def iter_download_attachments(self, user_id, msg_ids, save_dir, filename_contains=None, failed=None) -> Iterator[Path]:
+        from gmail_helper import GmailHelper
+
+        save_dir = Path(save_dir)
+        save_dir.mkdir(parents=True, exist_ok=True)
+        for mid in msg_ids:
+            for part in self.messages[mid]["payload"]["parts"]:
+                name = part.get("filename") or ""
+                if not name.lower().endswith(".pdf"):
+                    continue
+                if filename_contains and not GmailHelper.filename_matches(name, filename_contains):
+                    continue
+                out = GmailHelper._unique_path(save_dir / name)
+                out.write_bytes(self.get_attachment_bytes(user_id, mid, part))
+                yield out
+
+    def download_attachments_batch(self, user_id, msg_ids, save_dir, filename_contains=None, failed=None) -> List[Path]:
+        return list(self.iter_download_attachments(user_id, msg_ids, save_dir, filename_contains))
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import List, Optional, Set, Tuple, Union
+import shutil
+import sys
+import threading
+
+from gmail_helper import GmailHelper
+from sync_state import SyncState
+import stats
+
+
+class CathayFetchCoordinator:
+    """
+    One Gmail search and one fetch per message, shared by the Cathay parsers.
+
+    Both the US 客戶買賣報告書 and the TW 國泰證券日對帳單 come from the same
+    sender, so the coordinator lists each parser's own query (with its own
+    result cap), fetches the union of the messages once, downloads every
+    attachment either parser wants into a staging dir, and hands each parser
+    the files whose name contains its `filename_contains`.
+    """
+
+    def __init__(
+        self,
+        gmail: GmailHelper,
+        save_dir: Union[Path, str],
+        sync_state: Optional[SyncState] = None,
+    ) -> None:
+        self.gmail = gmail
+        self.save_dir = Path(save_dir)
+        self.sync_state = sync_state
+        self.sync_key = "cathay"
+        self._lock = threading.Lock()
+        self._filters: List[str] = []
+        # (query, max_results) per registered parser
+        self._queries: List[Tuple[str, int]] = []
+        self._claimed: Set[str] = set()
+        self._committed: Set[str] = set()
+        self._downloaded: Optional[List[Path]] = None
+        self._pending_history_id: Optional[str] = None
+        # A message failed to download, or a parser failed on a statement.
+        self._incomplete = False
+
+    def register(self, filename_contains: str, query: str, max_results: int = 50) -> None:
+        """
+        Declare a parser's attachment filter, Gmail query and result cap;
+        call before the first fetch_for().
+        """
+        self._filters.append(filename_contains)
+        self._queries.append((query, max_results))
+
+    def fetch_for(self, filename_contains: str, dest_dir: Union[Path, str]) -> List[Path]:
+        """
+        Run the shared search/download (first caller only), then move the
+        attachments matching `filename_contains` into `dest_dir`.
+        """
+        dest_dir = Path(dest_dir)
+        dest_dir.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            if self._downloaded is None:
+                # Credited to "cathay" rather than whichever parser asked first.
+                with stats.source("cathay"):
+                    self._downloaded = self._fetch()
+
+            mine = [p for p in self._downloaded if GmailHelper.filename_matches(p.name, filename_contains)]
+            self._downloaded = [p for p in self._downloaded if p not in mine]
+            moved: List[Path] = []
+            for p in mine:
+                target = GmailHelper._unique_path(dest_dir / p.name)
+                shutil.move(str(p), str(target))
+                moved.append(target)
+
+            self._claimed.add(filename_contains)
+            if self._claimed >= set(self._filters):
+                shutil.rmtree(self.save_dir, ignore_errors=True)
+            return moved
+
+    def commit_sync(self, filename_contains: str, complete: bool = True) -> None:
+        """
+        Persist the shared checkpoint once every registered parser has handled
+        its records; not at all if a download failed or a parser reports that
+        it skipped a statement (`complete=False`).
+        """
+        with self._lock:
+            self._committed.add(filename_contains)
+            if not complete:
+                self._incomplete = True
+            if (
+                self.sync_state is not None
+                and self._pending_history_id
+                and not self._incomplete
+                and self._committed >= set(self._filters)
+            ):
+                self.sync_state.set_history_id(self.sync_key, self._pending_history_id)
+                self._pending_history_id = None
+
+    def _fetch(self) -> List[Path]:
+        msg_ids, self._pending_history_id = self.gmail.search_queries_incremental(
+            "me", self._queries, self.sync_state, self.sync_key
+        )
+        if not msg_ids:
+            print("Cathay: No messages found matching query.", file=sys.stderr)
+            return []
+        failed: List[str] = []
+        downloaded = self.gmail.download_attachments_batch(
+            "me", msg_ids, self.save_dir, filename_contains=self._filters, failed=failed
+        )
+        if failed:
+            self._incomplete = True
+        print(f"Cathay: downloaded {len(downloaded)} file(s) from {len(msg_ids)} message(s) for all Cathay parsers.", file=sys.stderr)
+        return downloaded
@@ -1,13 +1,28 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Union
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Dict, Any, Optional, Tuple, Union
 import re
 import shutil
+import sys
+import tempfile
 import pdfplumber
 
 from trade_parser import TradeParser
 from gmail_helper import GmailHelper
+from sync_state import SyncState
+from result_cache import ResultCache, code_version
+from pdf_pool import parse_pdfs
+import local_files
+import stats
+import row_clustering
+from row_clustering import cluster_rows
+
+if TYPE_CHECKING:
+    from cathay_fetch import CathayFetchCoordinator
+
+# Cached parse results are only reused while this version matches.
+PARSER_VERSION = code_version(__file__, row_clustering.__file__)
 
 
 class CathayTWTradeParser(TradeParser):
@@ -33,69 +48,145 @@ class CathayTWTradeParser(TradeParser):
 
     def __init__(
         self,
-        gmail: GmailHelper,
+        gmail: Optional[GmailHelper],
         save_dir: Union[Path, str],
         password: Optional[str] = None,
         trace_back_days: Optional[int] = None,
+        sync_state: Optional[SyncState] = None,
+        result_cache: Optional[ResultCache] = None,
+        workers: int = 1,
+        fetcher: Optional["CathayFetchCoordinator"] = None,
     ) -> None:
         self.gmail = gmail
         self.save_dir = Path(save_dir)
         self.password = password
+        self.result_cache = result_cache
+        self.workers = workers
+        self.sync_state = sync_state
+        self.sync_key = "cathay_tw"
         self.filename_contains = "國泰證券日對帳單"
         if trace_back_days is not None and trace_back_days > 0:
             self.query = f"{self.DEFAULT_QUERY} newer_than:{trace_back_days}d"
         else:
             self.query = self.DEFAULT_QUERY
+        # When set, attachments come from the fetch shared with the US parser.
+        self.fetcher = fetcher
+        if fetcher is not None:
+            fetcher.register(self.filename_contains, self.query)
 
     # --- Phase 1: attachment fetching ---
     def fetch_attachments(self) -> List[Path]:
+        return list(self._iter_attachments())
+
+    def _iter_attachments(self) -> Iterator[Path]:
         self.save_dir.mkdir(parents=True, exist_ok=True)
-        msg_ids = self.gmail.search_messages("me", self.query)
-        if not msg_ids:
-            print("CathayTW: No messages found matching query.")
-            return []
-        downloaded: List[Path] = []
-        for mid in msg_ids:
-            files = self.gmail.download_attachments(
+        failed: List[str] = []
+        if self.fetcher is not None:
+            files: Iterable[Path] = self.fetcher.fetch_for(self.filename_contains, self.save_dir)
+        else:
+            msg_ids, self._pending_history_id = self.gmail.search_messages_incremental(
+                "me", self.query, self.sync_state, self.sync_key
+            )
+            if not msg_ids:
+                print("CathayTW: No messages found matching query.", file=sys.stderr)
+                return
+            files = self.gmail.iter_download_attachments(
                 user_id="me",
-                msg_id=mid,
+                msg_ids=msg_ids,
                 save_dir=self.save_dir,
                 filename_contains=self.filename_contains,
+                failed=failed,
             )
-            downloaded.extend(files)
+        downloaded = 0
+        for p in files:
+            downloaded += 1
+            yield p
+        if failed:
+            self._incomplete = True
         if not downloaded:
-            print("CathayTW: No matching attachments downloaded.")
+            print("CathayTW: No matching attachments downloaded.", file=sys.stderr)
         else:
-            print(f"CathayTW: downloaded {len(downloaded)} file(s) to {self.save_dir.resolve()}")
-        return downloaded
+            print(f"CathayTW: downloaded {downloaded} file(s) to {self.save_dir.resolve()}", file=sys.stderr)
 
     # --- TradeParser interface ---
-    def parse(self) -> List[Dict[str, Any]]:
-        paths = self.fetch_attachments()
-        if not paths:
-            return []
-        all_rows: List[Dict[str, Any]] = []
-        for p in paths:
-            if not str(p).lower().endswith('.pdf'):
+    def iter_parse(self) -> Iterator[Dict[str, Any]]:
+        self._incomplete = False
+        pdf_paths = (Path(p) for p in self._iter_attachments() if str(p).lower().endswith('.pdf'))
+        for p, result in parse_pdfs(self, pdf_paths, self.workers):
+            if isinstance(result, Exception):
+                print(f"Warning: failed to parse {p}: {result}", file=sys.stderr)
+                self._incomplete = True
                 continue
-            try:
-                all_rows.extend(self._parse_single_pdf(Path(p)))
-            except Exception as e:
-                print(f"Warning: failed to parse {p}: {e}")
+            yield from result
         # optional cleanup similar to US parser
         try:
             shutil.rmtree(self.save_dir)
         except Exception as e:
-            print(f"Warning: failed to remove temp dir {self.save_dir}: {e}")
-        return all_rows
+            print(f"Warning: failed to remove temp dir {self.save_dir}: {e}", file=sys.stderr)
+
+    def iter_parse_files(self, paths: Iterable[Union[Path, str]]) -> Iterator[Dict[str, Any]]:
+        """Parse saved statement PDFs (or .eml messages carrying them) without Gmail."""
+        extract_dir = Path(tempfile.mkdtemp(prefix="cathay_tw_"))
+        try:
+            pdf_paths = local_files.iter_statement_pdfs(paths, extract_dir, self.filename_contains)
+            for p, result in parse_pdfs(self, pdf_paths, self.workers):
+                if isinstance(result, Exception):
+                    print(f"Warning: failed to parse {p}: {result}", file=sys.stderr)
+                    continue
+                yield from result
+        finally:
+            shutil.rmtree(extract_dir, ignore_errors=True)
+
+    def find_files(self, directory: Union[Path, str]) -> List[Path]:
+        return [
+            p for p in local_files.list_files(directory, (".pdf", ".eml"))
+            if p.suffix.lower() == ".eml" or GmailHelper.filename_matches(p.name, self.filename_contains)
+        ]
+
+    def commit_sync(self) -> None:
+        super().commit_sync()
+        if self.fetcher is not None:
+            self.fetcher.commit_sync(self.filename_contains, complete=not self._incomplete)
 
     # --- Single-PDF parsing ---
+    def _parse_pdf_cached(self, pdf_path: Path) -> List[Dict[str, Any]]:
+        if self.result_cache is None:
+            return self._parse_single_pdf(pdf_path)
+        return self.result_cache.get_or_parse(
+            type(self).__name__, PARSER_VERSION, pdf_path, self._parse_single_pdf
+        )
+
     def _parse_single_pdf(self, pdf_path: Path) -> List[Dict[str, Any]]:
         lines = self._extract_lines(pdf_path)
-        settle_date = self._extract_settlement_date(lines)
-        name_to_code = self._extract_code_mapping(lines)
+        with stats.timer("match", items=len(lines)):
+            settle_date = self._extract_settlement_date(lines)
+            name_to_code = self._extract_code_mapping(lines)
+            matched = self._match_trades(lines)
 
-        trades: List[Dict[str, Any]] = []
+        with stats.timer("project", items=len(matched)):
+            trades: List[Dict[str, Any]] = []
+            for name, tt, shares, price, fee, rp_val in matched:
+                # Map name -> code if available; append .TW for 4-digit codes.
+                symbol = name_to_code.get(name, name)
+                if re.fullmatch(r"\d{4}", symbol):
+                    symbol = f"{symbol}.TW"
+                trade_type = self.TRADETYPE_MAP.get(tt, tt)
+                rec = {
+                    "symbol": symbol,
+                    "trade_type": trade_type,
+                    "currency": "TWD",
+                    "shares": shares,
+                    "price": price,
+                    "fee": fee,
+                    "date": settle_date or "",
+                    "total": rp_val,
+                }
+                trades.append(rec)
+        return trades
+
+    def _match_trades(self, lines: List[str]) -> List[Tuple[str, str, Any, Any, Any, Any]]:
+        """(name, trade type, shares, price, fee, receivable/payable) for each trade row."""
+        matched: List[Tuple[str, str, Any, Any, Any, Any]] = []
         i = 0
         while i < len(lines):
             s = lines[i]
@@ -129,52 +220,25 @@ class CathayTWTradeParser(TradeParser):
                             break
 
                 if shares is not None and price is not None and rp_val is not None:
-                    # Map name -> code if available; append .TW for 4-digit codes.
-                    symbol = name_to_code.get(name, name)
-                    if re.fullmatch(r"\d{4}", symbol):
-                        symbol = f"{symbol}.TW"
-                    trade_type = self.TRADETYPE_MAP.get(tt, tt)
-                    rec = {
-                        "symbol": symbol,
-                        "trade_type": trade_type,
-                        "currency": "TWD",
-                        "shares": shares,
-                        "price": price,
-                        "fee": fee,
-                        "date": settle_date or "",
-                        "total": rp_val,
-                    }
-                    trades.append(rec)
+                    matched.append((name, tt, shares, price, fee, rp_val))
                 i += 1
                 continue
             i += 1
 
-        return trades
+        return matched
 
     # --- helpers ---
     def _extract_lines(self, pdf_path: Path) -> List[str]:
         lines: List[str] = []
-        with pdfplumber.open(str(pdf_path), password=self.password) as pdf:
+        with stats.timer("pdf_open", items=1):
+            pdf = pdfplumber.open(str(pdf_path), password=self.password)
+        with pdf:
             for page in pdf.pages:
-                words = page.extract_words(x_tolerance=2, y_tolerance=2) or []
-                # cluster words into rows by y and sort by x0
-                rows: List[Dict[str, Any]] = []
-                for w in words:
-                    placed = False
-                    for row in rows:
-                        if abs(row["y"] - w["top"]) < 3:
-                            row["words"].append(w)
-                            row["y"] = (row["y"] * row["n"] + w["top"]) / (row["n"] + 1)
-                            row["n"] += 1
-                            placed = True
-                            break
-                    if not placed:
-                        rows.append({"y": w["top"], "n": 1, "words": [w]})
-                for row in rows:
-                    cells = sorted(row["words"], key=lambda w: w["x0"])
-                    text = " ".join(w["text"] for w in cells)
-                    # normalize whitespace
-                    lines.append(" ".join(text.split()))
+                with stats.timer("extract_words") as t:
+                    words = page.extract_words(x_tolerance=2, y_tolerance=2) or []
+                    t.items = len(words)
+                # cluster words into rows by y (strictly within 3pt) and sort by x0
+                lines.extend(cluster_rows(words, y_tol=3, inclusive=False))
         return lines
 
     def _extract_settlement_date(self, lines: List[str]) -> Optional[str]:
@@ -1,11 +1,26 @@
 from pathlib import Path
 import re
-from typing import Optional, List, Dict, Any
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional, List, Dict, Any, Union
 import pdfplumber
 import shutil
+import sys
+import tempfile
 
 from trade_parser import TradeParser
 from gmail_helper import GmailHelper
+from sync_state import SyncState
+from result_cache import ResultCache, code_version
+from pdf_pool import parse_pdfs
+import local_files
+import stats
+import row_clustering
+from row_clustering import cluster_rows
+
+if TYPE_CHECKING:
+    from cathay_fetch import CathayFetchCoordinator
+
+# Cached parse results are only reused while this version matches.
+PARSER_VERSION = code_version(__file__, row_clustering.__file__)
 
 
 class CathayUSTradeParser(TradeParser):
@@ -14,12 +29,20 @@ class CathayUSTradeParser(TradeParser):
 
     def __init__(
         self,
-        gmail: GmailHelper,
+        gmail: Optional[GmailHelper],
         save_dir: Path,
         password: Optional[str] = None,
         trace_back_days: int = 1,
+        sync_state: Optional[SyncState] = None,
+        result_cache: Optional[ResultCache] = None,
+        workers: int = 1,
+        fetcher: Optional["CathayFetchCoordinator"] = None,
     ):
         self.gmail = gmail
+        self.result_cache = result_cache
+        self.workers = workers
+        self.sync_state = sync_state
+        self.sync_key = "cathay_us"
         self.query = " ".join([
             "from:e-notification@ebill1.cathaysec.com.tw",
             "has:attachment",
@@ -28,64 +51,116 @@ class CathayUSTradeParser(TradeParser):
         ])
         self.save_dir = Path(save_dir)
         self.filename_contains = "客戶買賣報告書"
+        # When set, attachments come from the fetch shared with the TW parser.
+        self.fetcher = fetcher
+        if fetcher is not None:
+            fetcher.register(self.filename_contains, self.query)
         self.password = password
 
     # ---------- public API ----------
-    def parse(self) -> List[Dict[str, Any]]:
+    def iter_parse(self) -> Iterator[Dict[str, Any]]:
         """
         1) Search Gmail, download matching attachments to save_dir.
-        2) Parse all PDFs found into normalized JSON rows.
-        3) Return the list of rows.
+        2) Parse each PDF as soon as it is downloaded.
+        3) Yield normalized JSON rows as each statement is parsed.
         """
         self.save_dir.mkdir(parents=True, exist_ok=True)
+        self._incomplete = False
+        failed: List[str] = []
 
-        msg_ids = self.gmail.search_messages("me", self.query)
-        if not msg_ids:
-            print("No messages found matching query.")
-            return []
+        if self.fetcher is not None:
+            files: Iterable[Path] = self.fetcher.fetch_for(self.filename_contains, self.save_dir)
+        else:
+            msg_ids, self._pending_history_id = self.gmail.search_messages_incremental(
+                "me", self.query, self.sync_state, self.sync_key
+            )
+            if not msg_ids:
+                print("No messages found matching query.", file=sys.stderr)
+                return
 
-        downloaded: List[str] = []
-        for mid in msg_ids:
-            files = self.gmail.download_attachments(
-                "me", mid, self.save_dir, filename_contains=self.filename_contains
+            files = self.gmail.iter_download_attachments(
+                "me", msg_ids, self.save_dir, filename_contains=self.filename_contains, failed=failed
             )
-            downloaded.extend([str(p) for p in files])
 
-        if not downloaded:
-            print("No matching attachments downloaded.")
-            return []
+        downloaded = 0
+
+        def pdf_paths() -> Iterator[Path]:
+            nonlocal downloaded
+            for f in files:
+                downloaded += 1
+                if str(f).lower().endswith(".pdf"):
+                    yield Path(f)
 
-        all_rows: List[Dict[str, Any]] = []
-        for fpath in downloaded:
-            if not fpath.lower().endswith(".pdf"):
+        for fpath, pdf_rows in parse_pdfs(self, pdf_paths(), self.workers):
+            if isinstance(pdf_rows, Exception):
+                print(f"Warning: failed to parse {fpath}: {pdf_rows}", file=sys.stderr)
+                self._incomplete = True
                 continue
-            pdf_rows = self._parse_single_pdf(Path(fpath))
-            all_rows.extend(pdf_rows)
+            yield from pdf_rows
+        if failed:
+            self._incomplete = True
+
+        if not downloaded:
+            print("No matching attachments downloaded.", file=sys.stderr)
+            return
 
         # remove the save_dir after successfully parsing
         try:
             shutil.rmtree(self.save_dir)
         except Exception as e:
-            print(f"Warning: failed to remove temp dir {self.save_dir}: {e}")
+            print(f"Warning: failed to remove temp dir {self.save_dir}: {e}", file=sys.stderr)
 
-        return all_rows
+    def iter_parse_files(self, paths: Iterable[Union[Path, str]]) -> Iterator[Dict[str, Any]]:
+        """Parse saved statement PDFs (or .eml messages carrying them) without Gmail."""
+        extract_dir = Path(tempfile.mkdtemp(prefix="cathay_us_"))
+        try:
+            pdf_paths = local_files.iter_statement_pdfs(paths, extract_dir, self.filename_contains)
+            for p, result in parse_pdfs(self, pdf_paths, self.workers):
+                if isinstance(result, Exception):
+                    print(f"Warning: failed to parse {p}: {result}", file=sys.stderr)
+                    continue
+                yield from result
+        finally:
+            shutil.rmtree(extract_dir, ignore_errors=True)
+
+    def find_files(self, directory: Union[Path, str]) -> List[Path]:
+        return [
+            p for p in local_files.list_files(directory, (".pdf", ".eml"))
+            if p.suffix.lower() == ".eml" or GmailHelper.filename_matches(p.name, self.filename_contains)
+        ]
+
+    def commit_sync(self) -> None:
+        super().commit_sync()
+        if self.fetcher is not None:
+            self.fetcher.commit_sync(self.filename_contains, complete=not self._incomplete)
 
     # ---------- single-PDF parsing ----------
+    def _parse_pdf_cached(self, pdf_path: Path) -> List[Dict[str, Any]]:
+        if self.result_cache is None:
+            return self._parse_single_pdf(pdf_path)
+        return self.result_cache.get_or_parse(
+            type(self).__name__, PARSER_VERSION, pdf_path, self._parse_single_pdf
+        )
+
     def _parse_single_pdf(self, pdf_path: Path) -> List[Dict[str, Any]]:
         out: List[Dict[str, Any]] = []
-        with pdfplumber.open(pdf_path, password=self.password) as pdf:
+        with stats.timer("pdf_open", items=1):
+            pdf = pdfplumber.open(pdf_path, password=self.password)
+        with pdf:
             for page in pdf.pages:
                 out.extend(self._parse_page(page))
         return out
 
     # ---------- page parsing ----------
     def _parse_page(self, page) -> List[Dict[str, Any]]:
-        words = page.extract_words(
-            x_tolerance=1,
-            y_tolerance=1,
-            keep_blank_chars=False,
-            extra_attrs=["size", "fontname"],
-        )
+        with stats.timer("extract_words") as t:
+            words = page.extract_words(
+                x_tolerance=1,
+                y_tolerance=1,
+                keep_blank_chars=False,
+                extra_attrs=["size", "fontname"],
+            )
+            t.items = len(words)
 
         header = [w for w in words if "TradeReference" in w["text"] or "交易序號" in w["text"]]
         if not header:
@@ -98,20 +173,23 @@ class CathayUSTradeParser(TradeParser):
 
         lines = self._cluster_rows(region_words, y_tol=2.5)
 
-        recs, i = [], 0
-        while i < len(lines):
-            if re.match(r"^\d{8}\b", lines[i]):
-                A = self._parse_rowA(lines[i]) or {}
-                B = self._parse_rowB(lines[i + 1]) if i + 1 < len(lines) else {}
-                _ = self._parse_rowC(lines[i + 2]) if i + 2 < len(lines) else {}
-
-                merged = {}
-                merged.update(A)
-                merged.update(B)
-                recs.append(self._project_row(merged))
-                i += 3
-            else:
-                i += 1
+        rows, i = [], 0
+        with stats.timer("match", items=len(lines)):
+            while i < len(lines):
+                if re.match(r"^\d{8}\b", lines[i]):
+                    A = self._parse_rowA(lines[i]) or {}
+                    B = self._parse_rowB(lines[i + 1]) if i + 1 < len(lines) else {}
+                    _ = self._parse_rowC(lines[i + 2]) if i + 2 < len(lines) else {}
+
+                    merged = {}
+                    merged.update(A)
+                    merged.update(B)
+                    rows.append(merged)
+                    i += 3
+                else:
+                    i += 1
+        with stats.timer("project", items=len(rows)):
+            recs = [self._project_row(r) for r in rows]
         return [r for r in recs if r]
 
     # ---------- row parsers ----------
@@ -192,24 +270,7 @@ class CathayUSTradeParser(TradeParser):
     # ---------- utils ----------
     @staticmethod
     def _cluster_rows(words, y_tol: float = 2.5) -> List[str]:
-        rows = []
-        for w in sorted(words, key=lambda w: w["top"]):
-            placed = False
-            for row in rows:
-                if abs(row["y"] - w["top"]) <= y_tol:
-                    row["words"].append(w)
-                    row["y"] = (row["y"] * row["n"] + w["top"]) / (row["n"] + 1)
-                    row["n"] += 1
-                    placed = True
-                    break
-            if not placed:
-                rows.append({"y": w["top"], "n": 1, "words": [w]})
-        lines = []
-        for row in rows:
-            cells = sorted(row["words"], key=lambda w: w["x0"])
-            text = " ".join(w["text"] for w in cells)
-            lines.append(" ".join(text.split()))
-        return lines
+        return cluster_rows(words, y_tol=y_tol)
 
     @staticmethod
     def _to_num(x):
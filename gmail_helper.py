@@ -1,36 +1,137 @@
 from __future__ import annotations
 
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Iterator, List, Optional, Union
-
-from googleapiclient.discovery import build
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
+from typing import TYPE_CHECKING, Deque, Dict, Iterator, List, Optional, Sequence, Tuple, Union
 
 import base64
+import contextvars
+import sys
+import threading
+
+from gmail_quota import GmailQuota
+import stats
+
+# The Google client libraries are slow to import; they are loaded on first
+# use so that code needing only the static helpers (or no Gmail at all)
+# doesn't pay for them.
+if TYPE_CHECKING:
+    from google.oauth2.credentials import Credentials
+    from artifact_cache import ArtifactCache
+    from sync_state import SyncState
+
+
+def _parts_mask(fields: str, depth: int) -> str:
+    """`fields` for a MIME part and its descendants, `depth` levels of parts() deep."""
+    mask = fields
+    for _ in range(depth):
+        mask = f"{fields},parts({mask})"
+    return mask
 
 
 class GmailHelper:
     """
     Gmail API helper for:
-      - authenticating via OAuth
-      - searching messages
-      - downloading PDF attachments (skips S/MIME signatures)
+      - authenticating via OAuth (on the first API call, not at construction)
+      - searching messages (optionally incremental via historyId checkpoints)
+      - fetching messages in batches (Gmail batch HTTP endpoint)
+      - downloading PDF attachments (skips S/MIME signatures), optionally
+        on a bounded thread pool
+      - staying within the per-user quota (see GmailQuota): requests are
+        paced, and rate-limited ones (also inside batches) retried
+    Messages and attachment bytes are immutable in Gmail, so with an
+    ArtifactCache repeat runs read them from local disk instead.
     """
 
+    # Gmail accepts at most 100 calls per batch request.
+    BATCH_LIMIT = 100
+
+    # Partial-response masks (the `fields` parameter) per call site, so Gmail
+    # leaves out what we don't read: headers, snippets, labels, size estimates.
+    # Applied unless the helper is built with field_masks=False; see mask().
+    LIST_FIELDS = "messages/id,nextPageToken"
+    PROFILE_FIELDS = "historyId"
+    HISTORY_FIELDS = "history/messagesAdded/message/id,nextPageToken"
+    ATTACHMENT_FIELDS = "data"
+    RAW_FIELDS = "raw"
+    # First phase of attachment downloads: just the MIME tree (names, types,
+    # sizes, attachment ids), none of the body data a format="full" fetch
+    # carries (HTML notices, inline parts).
+    PART_INDEX_FIELDS = "id,payload(%s)" % _parts_mask("partId,filename,mimeType,body/attachmentId,body/size", 4)
+    # Message bodies: the MIME tree with inline data, without any headers.
+    BODY_FIELDS = "id,payload(%s)" % _parts_mask("partId,mimeType,body/attachmentId,body/data", 4)
+
     def __init__(
         self,
         credentials_path: Union[Path, str],
         token_path: Union[Path, str],
+        download_workers: int = 1,
+        cache: Optional["ArtifactCache"] = None,
+        discovery_document: Optional[Union[Path, str]] = None,
+        field_masks: bool = True,
+        quota: Optional[GmailQuota] = None,
     ):
         self.credentials_path = Path(credentials_path)
         self.token_path = Path(token_path)
         self.scopes = ["https://www.googleapis.com/auth/gmail.readonly"]
-        self.service = self._build_service()  # Build on init
+        # >1 downloads attachments of different messages concurrently
+        self.download_workers = max(1, download_workers)
+        self.cache = cache
+        # Gmail discovery document (JSON) to build the client from; defaults to
+        # the copy bundled with google-api-python-client. Never fetched online.
+        self.discovery_document = Path(discovery_document) if discovery_document else None
+        # False requests full responses everywhere (e.g. to debug a mask)
+        self.field_masks = field_masks
+        self.quota = quota or GmailQuota()
+        self.creds: Optional[Credentials] = None
+        self._local = threading.local()
+        self._path_lock = threading.Lock()
+        # Built / loaded on first use, see the service property and _credentials()
+        self._service = None
+        self._service_lock = threading.Lock()
+        self._creds_lock = threading.Lock()
+
+    @property
+    def service(self):
+        """
+        The Gmail API service, built on first access. One instance is shared by
+        all threads: it only builds request objects, which are executed on
+        each thread's own transport (see _execute).
+        """
+        if self._service is None:
+            with self._service_lock:
+                if self._service is None:
+                    self._service = self._build_service()
+        return self._service
 
     def _build_service(self):
-        """Authenticate and build the Gmail API service."""
+        """
+        Build the Gmail API service from a local discovery document. Needs
+        no credentials or network: requests are authorized when executed.
+        """
+        from googleapiclient.discovery import build, build_from_document
+        import httplib2
+
+        # The transport given here is never used for requests; it keeps the
+        # client library from looking up default credentials.
+        if self.discovery_document is not None:
+            return build_from_document(self.discovery_document.read_text(encoding="utf-8"), http=httplib2.Http())
+        return build("gmail", "v1", http=httplib2.Http(), static_discovery=True, cache_discovery=False)
+
+    def _credentials(self) -> "Credentials":
+        """Load (refreshing or running the OAuth flow if needed) the user's credentials once."""
+        if self.creds is None:
+            with self._creds_lock:
+                if self.creds is None:
+                    self.creds = self._load_credentials()
+        return self.creds
+
+    def _load_credentials(self) -> "Credentials":
+        from google.auth.transport.requests import Request
+        from google.oauth2.credentials import Credentials
+        from google_auth_oauthlib.flow import InstalledAppFlow
+
         creds: Optional[Credentials] = None
 
         if self.token_path.exists():
@@ -51,7 +152,35 @@ class GmailHelper:
             with open(self.token_path, "w") as token:
                 token.write(creds.to_json())
 
-        return build("gmail", "v1", credentials=creds)
+        return creds
+
+    def _http(self):
+        """
+        Per-thread authorized transport. httplib2 is not thread-safe, so every
+        request is executed on the calling thread's own connection.
+        """
+        http = getattr(self._local, "http", None)
+        if http is None:
+            from google_auth_httplib2 import AuthorizedHttp
+            import httplib2
+
+            http = AuthorizedHttp(self._credentials(), http=httplib2.Http())
+            self._local.http = http
+        return http
+
+    def _execute(self, request, units: Optional[int] = None):
+        """
+        Execute an API request (or batch) on the calling thread's transport,
+        within the quota. `units` defaults to the request method's cost; pass
+        it for batches (the sum of their calls').
+        """
+        if units is None:
+            units = self.quota.units(getattr(request, "methodId", None))
+        return self.quota.execute(lambda: request.execute(http=self._http()), units)
+
+    def mask(self, fields: str) -> Optional[str]:
+        """`fields` to send for a call site's mask, or None when masks are turned off."""
+        return fields if self.field_masks else None
 
     def search_messages(
         self,
@@ -67,7 +196,7 @@ class GmailHelper:
         page_token: Optional[str] = None
 
         while len(ids) < max_results:
-            resp = (
+            resp = self._execute(
                 self.service.users()
                 .messages()
                 .list(
@@ -75,8 +204,8 @@ class GmailHelper:
                     q=query,
                     maxResults=min(100, max_results - len(ids)),
                     pageToken=page_token,
+                    fields=self.mask(self.LIST_FIELDS),
                 )
-                .execute()
             )
             ids.extend([m["id"] for m in resp.get("messages", [])])
             page_token = resp.get("nextPageToken")
@@ -85,25 +214,373 @@ class GmailHelper:
 
         return ids[:max_results]
 
+    def get_history_id(self, user_id: str) -> str:
+        """Return the mailbox's current historyId."""
+        profile = self._execute(
+            self.service.users().getProfile(userId=user_id, fields=self.mask(self.PROFILE_FIELDS))
+        )
+        return str(profile["historyId"])
+
+    def list_added_message_ids(self, user_id: str, start_history_id: str) -> Optional[List[str]]:
+        """
+        Return IDs of messages added since `start_history_id` via users.history.list.
+        Returns None when the checkpoint is too old for Gmail to answer (HTTP 404).
+        """
+        from googleapiclient.errors import HttpError
+
+        ids: List[str] = []
+        page_token: Optional[str] = None
+
+        while True:
+            try:
+                resp = self._execute(
+                    self.service.users()
+                    .history()
+                    .list(
+                        userId=user_id,
+                        startHistoryId=start_history_id,
+                        historyTypes=["messageAdded"],
+                        pageToken=page_token,
+                        fields=self.mask(self.HISTORY_FIELDS),
+                    )
+                )
+            except HttpError as e:
+                if e.resp.status == 404:
+                    return None
+                raise
+            for record in resp.get("history", []):
+                for added in record.get("messagesAdded", []):
+                    ids.append(added["message"]["id"])
+            page_token = resp.get("nextPageToken")
+            if not page_token:
+                break
+
+        return list(dict.fromkeys(ids))
+
+    def search_messages_incremental(
+        self,
+        user_id: str,
+        query: str,
+        sync_state: Optional["SyncState"] = None,
+        sync_key: str = "",
+        max_results: int = 50,
+    ) -> Tuple[List[str], Optional[str]]:
+        """
+        Like search_messages, but when `sync_state` holds a checkpoint for `sync_key`
+        only messages added since then are returned. Falls back to the full query
+        when there is no checkpoint or it has expired.
+
+        Returns (message_ids, checkpoint); store the checkpoint with
+        sync_state.set_history_id() once the messages have been handled.
+        """
+        return self.search_queries_incremental(user_id, [(query, max_results)], sync_state, sync_key)
+
+    def search_queries_incremental(
+        self,
+        user_id: str,
+        queries: Sequence[Tuple[str, int]],
+        sync_state: Optional["SyncState"] = None,
+        sync_key: str = "",
+    ) -> Tuple[List[str], Optional[str]]:
+        """
+        search_messages_incremental for several (query, max_results) pairs
+        sharing one checkpoint. Each query is listed with its own cap; the
+        result is the union of their ids, in first-seen order.
+        """
+        with stats.timer("search") as t:
+            ids, checkpoint = self._search_incremental(user_id, queries, sync_state, sync_key)
+            t.items = len(ids)
+        return ids, checkpoint
+
+    def _search_all(self, user_id: str, queries: Sequence[Tuple[str, int]]) -> List[str]:
+        ids: List[str] = []
+        for query, max_results in queries:
+            ids.extend(self.search_messages(user_id, query, max_results))
+        return list(dict.fromkeys(ids))
+
+    def _search_incremental(
+        self,
+        user_id: str,
+        queries: Sequence[Tuple[str, int]],
+        sync_state: Optional["SyncState"],
+        sync_key: str,
+    ) -> Tuple[List[str], Optional[str]]:
+        if sync_state is None:
+            return self._search_all(user_id, queries), None
+
+        # Taken before listing so mail arriving meanwhile is seen by the next run.
+        checkpoint = self.get_history_id(user_id)
+        start = sync_state.get_history_id(sync_key)
+        added = self.list_added_message_ids(user_id, start) if start else None
+        if added is None:
+            if start:
+                print(f"{sync_key}: history checkpoint expired; falling back to full query.", file=sys.stderr)
+            return self._search_all(user_id, queries), checkpoint
+        if not added:
+            return [], checkpoint
+
+        # history.list can't filter by query; keep only new messages that match it.
+        added_set = set(added)
+        matching = self._search_all(user_id, queries)
+        return [mid for mid in matching if mid in added_set], checkpoint
+
+    def get_message(
+        self,
+        user_id: str,
+        msg_id: str,
+        format: str = "full",
+        fields: Optional[str] = None,
+    ) -> dict:
+        """Fetch a single message (served from the cache when possible)."""
+        key = self._message_key(user_id, msg_id, format, fields)
+        if self.cache is not None:
+            msg = self.cache.get_json(key)
+            if msg is not None:
+                return msg
+        kwargs = {"userId": user_id, "id": msg_id, "format": format}
+        if fields:
+            kwargs["fields"] = fields
+        with stats.timer("fetch", items=1):
+            msg = self._execute(self.service.users().messages().get(**kwargs))
+        if self.cache is not None:
+            self.cache.put_json(key, msg)
+        return msg
+
+    def get_messages_batch(
+        self,
+        user_id: str,
+        ids: Sequence[str],
+        format: str = "full",
+        fields: Optional[str] = None,
+        failed: Optional[List[str]] = None,
+    ) -> List[dict]:
+        """
+        Fetch many messages via the Gmail batch endpoint, BATCH_LIMIT per HTTP call.
+        Returns messages in the order of `ids`. A message that still fails
+        after the quota's retries raises RuntimeError, unless a `failed` list
+        is passed: its id is then appended there and the message skipped.
+        """
+        messages: List[dict] = []
+        for chunk in self._iter_message_batches(user_id, ids, format=format, fields=fields, failed=failed):
+            messages.extend(chunk)
+        return messages
+
+    def _iter_message_batches(
+        self,
+        user_id: str,
+        ids: Sequence[str],
+        format: str = "full",
+        fields: Optional[str] = None,
+        failed: Optional[List[str]] = None,
+    ) -> Iterator[List[dict]]:
+        """
+        Yield messages window by window, in the order of `ids`. Each window holds
+        up to BATCH_LIMIT cache misses, fetched with one batch request.
+        Failed fetches are handled as in get_messages_batch.
+        """
+        unique_ids = list(dict.fromkeys(ids))  # batch request ids must be unique
+        pos = 0
+
+        while pos < len(unique_ids):
+            window: List[str] = []
+            found: Dict[str, dict] = {}
+            misses: List[str] = []
+            while pos < len(unique_ids) and len(misses) < self.BATCH_LIMIT:
+                mid = unique_ids[pos]
+                pos += 1
+                window.append(mid)
+                msg = None
+                if self.cache is not None:
+                    msg = self.cache.get_json(self._message_key(user_id, mid, format, fields))
+                if msg is None:
+                    misses.append(mid)
+                else:
+                    found[mid] = msg
+
+            if misses:
+                found.update(self._fetch_batch(user_id, misses, format, fields, failed))
+
+            yield [found[mid] for mid in window if mid in found]
+
+    def _fetch_batch(
+        self,
+        user_id: str,
+        ids: Sequence[str],
+        format: str,
+        fields: Optional[str],
+        failed: Optional[List[str]] = None,
+    ) -> Dict[str, dict]:
+        """
+        Fetch up to BATCH_LIMIT messages with one batch request; fill the cache.
+        Calls that were throttled within the batch are sent again in a new
+        batch after a backoff. Calls that still fail go to `failed`, or raise
+        RuntimeError (once the others are cached) when it is None.
+        """
+        fetched: Dict[str, dict] = {}
+        throttled: List[Tuple[str, Exception]] = []
+        errors: Dict[str, Exception] = {}
+        attempt = 0
+
+        def _on_response(request_id, response, exception):
+            if exception is None:
+                fetched[request_id] = response
+            elif attempt < self.quota.max_retries and self.quota.retryable(exception):
+                throttled.append((request_id, exception))
+            else:
+                errors[request_id] = exception
+
+        pending = list(ids)
+        while pending:
+            batch = self.service.new_batch_http_request(callback=_on_response)
+            for mid in pending:
+                kwargs = {"userId": user_id, "id": mid, "format": format}
+                if fields:
+                    kwargs["fields"] = fields
+                batch.add(self.service.users().messages().get(**kwargs), request_id=mid)
+            with stats.timer("fetch", items=len(pending)):
+                self._execute(batch, units=len(pending) * self.quota.units("gmail.users.messages.get"))
+            if not throttled:
+                break
+            self.quota.backoff(attempt, throttled[0][1], items=len(throttled))
+            attempt += 1
+            pending = [mid for mid, _ in throttled]
+            throttled.clear()
+
+        if self.cache is not None:
+            for mid, msg in fetched.items():
+                self.cache.put_json(self._message_key(user_id, mid, format, fields), msg)
+        if errors:
+            if failed is None:
+                mid, error = next(iter(errors.items()))
+                raise RuntimeError(f"Failed to fetch {len(errors)} message(s), e.g. {mid}: {error}")
+            for mid, error in errors.items():
+                print(f"Warning: failed to fetch message {mid}: {error}", file=sys.stderr)
+            failed.extend(errors)
+        return fetched
+
+    @staticmethod
+    def _message_key(user_id: str, msg_id: str, format: str, fields: Optional[str]) -> str:
+        return f"message/{user_id}/{msg_id}/{format}/{fields or '*'}"
+
+    def get_attachment_bytes(self, user_id: str, msg_id: str, part: dict) -> Optional[bytes]:
+        """
+        Return the decoded bytes of a message part: taken from inline body
+        data when present, otherwise fetched via attachments.get (cached by
+        message id + part id). Returns None if the part carries neither.
+        """
+        body = part.get("body", {}) or {}
+
+        if body.get("data"):
+            return base64.urlsafe_b64decode(body["data"].encode("utf-8"))
+        if "attachmentId" in body:
+            att_id = body["attachmentId"]
+            # attachmentId changes between fetches of the same message; partId doesn't.
+            key = f"attachment/{user_id}/{msg_id}/{part.get('partId') or att_id}"
+            if self.cache is not None:
+                data = self.cache.get(key)
+                if data is not None:
+                    return data
+            att = self._execute(
+                self.service.users()
+                .messages()
+                .attachments()
+                .get(userId=user_id, messageId=msg_id, id=att_id, fields=self.mask(self.ATTACHMENT_FIELDS))
+            )
+            data = base64.urlsafe_b64decode(att["data"].encode("utf-8"))
+            if self.cache is not None:
+                self.cache.put(key, data)
+            return data
+        return None
+
+    def download_attachments_batch(
+        self,
+        user_id: str,
+        msg_ids: Sequence[str],
+        save_dir: Path,
+        filename_contains: Optional[Union[str, Sequence[str]]] = None,
+        failed: Optional[List[str]] = None,
+    ) -> List[Path]:
+        """
+        Batch-fetch the messages, then download their PDF attachments.
+        Files are returned in message order. Messages that can't be fetched
+        are handled as in get_messages_batch.
+        """
+        return list(self.iter_download_attachments(user_id, msg_ids, save_dir, filename_contains, failed))
+
+    def iter_download_attachments(
+        self,
+        user_id: str,
+        msg_ids: Sequence[str],
+        save_dir: Path,
+        filename_contains: Optional[Union[str, Sequence[str]]] = None,
+        failed: Optional[List[str]] = None,
+    ) -> Iterator[Path]:
+        """
+        Like download_attachments_batch, but yields each file (in message order)
+        as soon as its message is done, so callers can parse while downloading.
+        With download_workers > 1, attachments are fetched, decoded and written on
+        a thread pool while the next message batch is still being fetched.
+
+        Messages are fetched with PART_INDEX_FIELDS only; attachment bytes are
+        then fetched just for the parts that match, so messages without a
+        matching attachment cost one small response each.
+        """
+        batches = self._iter_message_batches(
+            user_id, msg_ids, format="full", fields=self.mask(self.PART_INDEX_FIELDS), failed=failed
+        )
+
+        if self.download_workers == 1:
+            for msgs in batches:
+                for msg in msgs:
+                    yield from self.download_attachments(
+                        user_id,
+                        msg["id"],
+                        save_dir,
+                        filename_contains=filename_contains,
+                        msg=msg,
+                    )
+            return
+
+        with ThreadPoolExecutor(max_workers=self.download_workers) as pool:
+            pending: Deque[Future] = deque()
+            for msgs in batches:
+                for msg in msgs:
+                    # Each task runs in a copy of this context so stats keep the caller's source.
+                    pending.append(pool.submit(
+                        contextvars.copy_context().run,
+                        self.download_attachments,
+                        user_id,
+                        msg["id"],
+                        save_dir,
+                        filename_contains,
+                        msg,
+                    ))
+                while pending and pending[0].done():
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+
     def download_attachments(
         self,
         user_id: str,
         msg_id: str,
         save_dir: Path,
-        filename_contains: Optional[str] = None,
+        filename_contains: Optional[Union[str, Sequence[str]]] = None,
+        msg: Optional[dict] = None,
     ) -> List[Path]:
         """
         Download real PDF attachments (skip S/MIME signatures like smime.p7s).
+        `filename_contains` may be one substring or several (any must match).
+        Pass `msg` (a format="full" message, or one fetched with
+        PART_INDEX_FIELDS) to skip fetching it again.
         """
         save_dir = Path(save_dir)
         save_dir.mkdir(parents=True, exist_ok=True)
 
-        msg = self.service.users().messages().get(
-            userId=user_id,
-            id=msg_id,
-            format="full"
-        ).execute()
+        if msg is None:
+            msg = self.get_message(user_id, msg_id, format="full", fields=self.mask(self.PART_INDEX_FIELDS))
         payload = msg.get("payload", {}) or {}
+        full_parts: Optional[Dict[str, dict]] = None  # partId -> part, see below
 
         downloaded: List[Path] = []
         for part in self._walk_parts(payload):
@@ -121,33 +598,31 @@ class GmailHelper:
             if not is_pdf:
                 continue
 
-            if filename_contains and filename_contains.lower() not in filename.lower():
+            if filename_contains and not self.filename_matches(filename, filename_contains):
                 continue
 
-            body = part.get("body", {}) or {}
-            data_bytes = None
+            body = part.get("body") or {}
+            if body.get("size") and "attachmentId" not in body and "data" not in body:
+                # Small attachments come inline, and the part index left their data out.
+                if full_parts is None:
+                    full = self.get_message(user_id, msg_id, format="full", fields=self.mask(self.BODY_FIELDS))
+                    full_parts = {p.get("partId"): p for p in self._walk_parts(full.get("payload", {}) or {})}
+                part = full_parts.get(part.get("partId"), part)
 
-            if "attachmentId" in body:
-                att_id = body["attachmentId"]
-                att = (
-                    self.service.users()
-                    .messages()
-                    .attachments()
-                    .get(userId=user_id, messageId=msg_id, id=att_id)
-                    .execute()
-                )
-                data_bytes = base64.urlsafe_b64decode(att["data"].encode("utf-8"))
-            elif "data" in body:
-                data_bytes = base64.urlsafe_b64decode(body["data"].encode("utf-8"))
-            else:
+            with stats.timer("download") as t:
+                data_bytes = self.get_attachment_bytes(user_id, msg_id, part)
+                t.items = 0 if data_bytes is None else 1
+            if data_bytes is None:
                 continue
 
             # Ensure a filename
             if not filename:
                 filename = "attachment.pdf"
 
-            # Avoid name collisions
-            out_path = self._unique_path(save_dir / filename)
+            # Avoid name collisions (reserve the path so concurrent workers can't take it)
+            with self._path_lock:
+                out_path = self._unique_path(save_dir / filename)
+                out_path.touch()
 
             with open(out_path, "wb") as f:
                 f.write(data_bytes)
@@ -156,6 +631,12 @@ class GmailHelper:
 
         return downloaded
 
+    @staticmethod
+    def filename_matches(filename: str, contains: Union[str, Sequence[str]]) -> bool:
+        """Case-insensitive: does `filename` contain the substring (or any of the substrings)?"""
+        needles = [contains] if isinstance(contains, str) else contains
+        return any(n.lower() in filename.lower() for n in needles)
+
     @staticmethod
     def _walk_parts(part: dict) -> Iterator[dict]:
         """Yield this part and all descendants (Gmail MIME trees can nest)."""
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+from typing import Callable, Optional, TypeVar
+import random
+import threading
+import time
+
+import stats
+
+T = TypeVar("T")
+
+# Gmail API quota units per call (https://developers.google.com/gmail/api/reference/quota).
+# Calls inside a batch request are charged one by one.
+QUOTA_UNITS = {
+    "gmail.users.getProfile": 1,
+    "gmail.users.history.list": 2,
+    "gmail.users.messages.list": 5,
+    "gmail.users.messages.get": 5,
+    "gmail.users.messages.attachments.get": 5,
+}
+DEFAULT_UNITS = 5
+
+# 403 reasons Gmail uses for rate limiting (as opposed to real permission errors)
+RATE_LIMIT_REASONS = (b"rateLimitExceeded", b"userRateLimitExceeded")
+
+
+class GmailQuota:
+    """
+    Paces Gmail API calls to the per-user quota and retries throttled ones.
+
+    A token bucket of quota units refills at `units_per_sec` (Gmail allows
+    250 per user per second) and holds up to `burst` units; every call takes
+    its method's units before it is sent, waiting for the bucket if needed.
+    Calls failing with 429, 5xx or a 403 rateLimitExceeded are retried up to
+    `max_retries` times with jittered exponential backoff (or Retry-After),
+    during which the bucket is drained so other threads back off too.
+
+    One instance is shared by all threads of a GmailHelper. Time spent
+    waiting is recorded as the "throttle" stats stage (items = retries)
+    and left out of the search/fetch/download timers it happens in.
+    """
+
+    def __init__(
+        self,
+        units_per_sec: float = 250.0,
+        burst: Optional[float] = None,
+        max_retries: int = 5,
+        backoff_factor: float = 1.0,
+        max_backoff: float = 32.0,
+    ):
+        # <= 0 disables pacing (retries still apply)
+        self.units_per_sec = units_per_sec
+        self.burst = burst if burst is not None else max(units_per_sec, DEFAULT_UNITS)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self._lock = threading.Lock()
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+
+    @staticmethod
+    def units(method_id: Optional[str]) -> int:
+        """Quota units charged for one call of `method_id` (e.g. "gmail.users.messages.get")."""
+        return QUOTA_UNITS.get(method_id or "", DEFAULT_UNITS)
+
+    def acquire(self, units: float) -> None:
+        """
+        Block until the bucket can pay for `units`. Calls costing more than
+        `burst` (large batches) go through once the bucket is full and leave
+        it in debt, which later calls wait out.
+        """
+        if self.units_per_sec <= 0:
+            return
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.units_per_sec)
+                self._updated = now
+                need = min(units, self.burst)
+                if self._tokens >= need:
+                    self._tokens -= units
+                    break
+                wait = (need - self._tokens) / self.units_per_sec
+            time.sleep(wait)
+            waited += wait
+        if waited:
+            stats.record("throttle", waited)
+
+    def backoff(self, attempt: int, error: Optional[BaseException] = None, items: int = 1) -> None:
+        """
+        Sleep before retry number `attempt` (0-based) of `items` throttled
+        calls: Retry-After when the error carries one, otherwise an
+        exponential delay with jitter.
+        """
+        delay = self._retry_after(error)
+        if delay is None:
+            delay = min(self.max_backoff, self.backoff_factor * (2 ** attempt)) * random.uniform(0.5, 1.0)
+        with self._lock:
+            self._tokens = min(self._tokens, 0.0)
+            self._updated = time.monotonic()
+        with stats.timer("throttle", items=items):
+            time.sleep(delay)
+
+    def execute(self, call: Callable[[], T], units: float) -> T:
+        """Run `call` (one API request costing `units`) within the quota, retrying throttled attempts."""
+        attempt = 0
+        while True:
+            self.acquire(units)
+            try:
+                return call()
+            except Exception as e:
+                if attempt >= self.max_retries or not self.retryable(e):
+                    raise
+                self.backoff(attempt, e)
+                attempt += 1
+
+    @staticmethod
+    def retryable(error: BaseException) -> bool:
+        """Is `error` a rate limit or transient failure worth retrying?"""
+        from googleapiclient.errors import HttpError
+
+        if isinstance(error, (ConnectionError, TimeoutError)):
+            return True
+        if not isinstance(error, HttpError):
+            return False
+        status = error.resp.status
+        if status == 429 or status >= 500:
+            return True
+        return status == 403 and any(r in (error.content or b"") for r in RATE_LIMIT_REASONS)
+
+    @staticmethod
+    def _retry_after(error: Optional[BaseException]) -> Optional[float]:
+        resp = getattr(error, "resp", None)
+        value = resp.get("retry-after") if hasattr(resp, "get") else None
+        try:
+            return max(0.0, float(value)) if value is not None else None
+        except ValueError:  # an HTTP date; fall back to backoff
+            return None
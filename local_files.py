@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import email
+from email import policy
+from email.message import EmailMessage
+from email.parser import BytesHeaderParser
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from gmail_helper import GmailHelper
+
+# Helpers for parsing a local archive instead of Gmail (--from-dir): directory
+# listing and reading saved .eml messages with the stdlib `email` package.
+
+
+def list_files(directory: Union[Path, str], suffixes: Sequence[str]) -> List[Path]:
+    """All files under `directory` (recursively) with one of `suffixes`, sorted by path."""
+    suffixes = tuple(s.lower() for s in suffixes)
+    return sorted(
+        p for p in Path(directory).rglob("*")
+        if p.is_file() and p.suffix.lower() in suffixes
+    )
+
+
+def read_eml(path: Union[Path, str]) -> EmailMessage:
+    with open(path, "rb") as f:
+        return email.message_from_binary_file(f, policy=policy.default)
+
+
+def eml_sender(path: Union[Path, str]) -> str:
+    """The From header of the .eml at `path`, reading only its headers."""
+    with open(path, "rb") as f:
+        headers = BytesHeaderParser(policy=policy.default).parse(f)
+    return str(headers.get("From", ""))
+
+
+def eml_bodies(msg: EmailMessage) -> Tuple[Optional[str], Optional[str]]:
+    """Return (html, text) bodies, concatenating every text/html and text/plain part."""
+    html: Optional[str] = None
+    text: Optional[str] = None
+    for part in msg.walk():
+        if part.is_multipart() or part.get_filename():
+            continue
+        mime = part.get_content_type()
+        if mime not in ("text/html", "text/plain"):
+            continue
+        try:
+            decoded = part.get_content()
+        except (LookupError, ValueError):  # unknown charset / broken encoding
+            payload = part.get_payload(decode=True) or b""
+            decoded = payload.decode("utf-8", errors="replace")
+        if mime == "text/html":
+            html = (html or "") + decoded
+        else:
+            text = (text or "") + decoded
+    return html, text
+
+
+def eml_attachments(
+    msg: EmailMessage,
+    filename_contains: Optional[Union[str, Sequence[str]]] = None,
+) -> Iterator[Tuple[str, bytes]]:
+    """Yield (filename, bytes) for PDF attachments, optionally filtered by filename."""
+    for part in msg.walk():
+        filename = part.get_filename()
+        if not filename or not filename.lower().endswith(".pdf"):
+            continue
+        if filename_contains and not GmailHelper.filename_matches(filename, filename_contains):
+            continue
+        yield filename, part.get_payload(decode=True) or b""
+
+
+def save_eml_attachments(
+    path: Union[Path, str],
+    save_dir: Path,
+    filename_contains: Optional[Union[str, Sequence[str]]] = None,
+) -> List[Path]:
+    """Write the matching PDF attachments of the .eml at `path` into save_dir."""
+    saved: List[Path] = []
+    for filename, data in eml_attachments(read_eml(path), filename_contains):
+        out = GmailHelper._unique_path(save_dir / Path(filename).name)
+        out.write_bytes(data)
+        saved.append(out)
+    return saved
+
+
+def iter_statement_pdfs(
+    paths: Iterable[Union[Path, str]],
+    extract_dir: Path,
+    filename_contains: Optional[Union[str, Sequence[str]]] = None,
+) -> Iterator[Path]:
+    """
+    Yield the PDFs among `paths`; a .eml is replaced by its matching PDF
+    attachments, extracted into extract_dir. Other files are skipped.
+    """
+    for path in paths:
+        path = Path(path)
+        suffix = path.suffix.lower()
+        if suffix == ".pdf":
+            yield path
+        elif suffix == ".eml":
+            extract_dir.mkdir(parents=True, exist_ok=True)
+            yield from save_eml_attachments(path, extract_dir, filename_contains)
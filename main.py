@@ -1,66 +1,292 @@
+from __future__ import annotations
+
 import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import itertools
 from pathlib import Path
 import json
 import os
-from typing import List, Dict, Any, Optional
+import sys
+import textwrap
+import time
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Dict, Any, Optional, Sequence, Tuple
+
+import stats
 
-from gmail_helper import GmailHelper
-from cathay_us_trade_parser import CathayUSTradeParser
-from cathay_tw_trade_parser import CathayTWTradeParser
-from schwab_trade_parser import SchwabTradeParser
+# Heavy dependencies (Google API client, pdfplumber, bs4, requests, aiohttp)
+# are imported where they are first needed, so a run only loads what the
+# selected sources and options use.
+if TYPE_CHECKING:
+    from gmail_helper import GmailHelper
+    from sync_state import SyncState
+    from result_cache import ResultCache
+    from portfolio_client import PortfolioClient
+    from push_ledger import PushLedger
+    from async_portfolio_client import AsyncPortfolioClient
 
-from portfolio_client import PortfolioClient
+SOURCES = ("cathay_us", "cathay_tw", "schwab")
 
 
 from typing import Optional
 
 
 def build_parsers(
-    gmail: GmailHelper,
+    gmail: Optional[GmailHelper],
     save_dir: Path,
     pdf_password: Optional[str],
     trace_back_days: int,
     keep_artifacts: bool = False,
+    sync_state: Optional[SyncState] = None,
+    result_cache: Optional[ResultCache] = None,
+    workers: int = 1,
+    share_cathay_fetch: bool = False,
+    sources: Sequence[str] = SOURCES,
 ) -> dict:
-    return {
-        "cathay_us": CathayUSTradeParser(
+    """Build the parsers for `sources`; only their modules (and dependencies) are imported."""
+    # Both Cathay parsers read the same sender; optionally fetch its mail once for both.
+    cathay_fetcher = None
+    if share_cathay_fetch and {"cathay_us", "cathay_tw"} <= set(sources):
+        from cathay_fetch import CathayFetchCoordinator
+
+        cathay_fetcher = CathayFetchCoordinator(
+            gmail=gmail,
+            save_dir=save_dir / "cathay",
+            sync_state=sync_state,
+        )
+
+    parsers = {}
+    if "cathay_us" in sources:
+        from cathay_us_trade_parser import CathayUSTradeParser
+
+        parsers["cathay_us"] = CathayUSTradeParser(
             gmail=gmail,
             save_dir=save_dir / "cathay_us",
             password=pdf_password,
             trace_back_days=trace_back_days,
-        ),
-        "cathay_tw": CathayTWTradeParser(
+            sync_state=sync_state,
+            result_cache=result_cache,
+            workers=workers,
+            fetcher=cathay_fetcher,
+        )
+    if "cathay_tw" in sources:
+        from cathay_tw_trade_parser import CathayTWTradeParser
+
+        parsers["cathay_tw"] = CathayTWTradeParser(
             gmail=gmail,
             save_dir=save_dir / "cathay_tw",
             password=pdf_password,
             trace_back_days=trace_back_days,
-        ),
-        "schwab": SchwabTradeParser(
+            sync_state=sync_state,
+            result_cache=result_cache,
+            workers=workers,
+            fetcher=cathay_fetcher,
+        )
+    if "schwab" in sources:
+        from schwab_trade_parser import SchwabTradeParser
+
+        parsers["schwab"] = SchwabTradeParser(
             gmail=gmail,
             save_dir=save_dir / "schwab",
             trace_back_days=trace_back_days,
             keep_artifacts=keep_artifacts,
-        ),
-    }
+            sync_state=sync_state,
+        )
+    return parsers
+
 
+def run_single(parser_key: str, parsers: dict, from_dir: Optional[Path] = None) -> List[Dict[str, Any]]:
+    return list(iter_single(parser_key, parsers, from_dir))
 
-def run_single(parser_key: str, parsers: dict) -> List[Dict[str, Any]]:
+
+def iter_single(parser_key: str, parsers: dict, from_dir: Optional[Path] = None) -> Iterator[Dict[str, Any]]:
+    """Like run_single, but yields records while the parser is still fetching."""
     parser = parsers[parser_key]
-    print(f"Running parser: {parser_key}")
-    return parser.parse()
+    print(f"Running parser: {parser_key}", file=sys.stderr)
+    if from_dir is not None:
+        return parser.iter_parse_directory(from_dir)
+    return parser.iter_parse()
 
 
-def push_records(client: PortfolioClient, portfolio_name: str, records: List[Dict[str, Any]]) -> Any:
-    # Create/find portfolio, then upsert transactions
-    portfolio = client.get_or_create_portfolio(portfolio_name)
-    portfolio_id = (
-        portfolio.get("id")
-        or portfolio.get("portfolio_id")
-        or portfolio.get("data", {}).get("id")
-    )
-    if not portfolio_id:
-        raise RuntimeError(f"Unable to determine portfolio id from response: {portfolio}")
-    return client.upsert_transactions(portfolio_id, records)
+def stamp_portfolio(records: Iterable[Dict[str, Any]], portfolio_name: str) -> Iterator[Dict[str, Any]]:
+    # Add portfolio name as metadata on each record (harmless; server may ignore)
+    for r in records:
+        r["portfolio_name"] = portfolio_name
+        yield r
+
+
+def print_records(records: Iterable[Dict[str, Any]]) -> None:
+    """Print records as a JSON array (same text as json.dumps(indent=2)), one element as soon as it arrives."""
+    first = True
+    for r in records:
+        item = textwrap.indent(json.dumps(r, indent=2, ensure_ascii=False), "  ")
+        print(("[\n" if first else ",\n") + item, end="", flush=True)
+        first = False
+    print("[]" if first else "\n]")
+
+
+def run_timed(parser_key: str, parsers: dict, from_dir: Optional[Path] = None) -> Tuple[List[Dict[str, Any]], float]:
+    start = time.perf_counter()
+    with stats.source(parser_key):
+        records = run_single(parser_key, parsers, from_dir)
+    return records, time.perf_counter() - start
+
+
+def push_records(
+    client: PortfolioClient,
+    portfolio_name: str,
+    records: Iterable[Dict[str, Any]],
+    ledger: Optional[PushLedger] = None,
+    stream: bool = False,
+) -> Any:
+    if stream:
+        return push_records_stream(client, portfolio_name, records, ledger)
+    from portfolio_client import PortfolioNotFoundError
+
+    records, skipped = select_new(client.base, portfolio_name, list(records), ledger)
+    if skipped is not None:
+        return skipped
+
+    # Create/find portfolio (id is cached), then upsert transactions
+    with stats.timer("push", items=len(records)):
+        portfolio_id = client.resolve_portfolio_id(portfolio_name)
+        try:
+            result = client.upsert_transactions(portfolio_id, records)
+        except PortfolioNotFoundError:
+            # Stale cached id (portfolio deleted/recreated): look it up again once.
+            client.forget_portfolio_id(portfolio_name)
+            portfolio_id = client.resolve_portfolio_id(portfolio_name)
+            result = client.upsert_transactions(portfolio_id, records)
+
+    acknowledge_pushed(client.base, records, result, ledger)
+    return result
+
+
+def select_new(
+    base: str,
+    portfolio_name: str,
+    records: List[Dict[str, Any]],
+    ledger: Optional[PushLedger],
+) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """
+    Drop records the API already acknowledged in an earlier run. Returns
+    (records to push, None), or ([], result to report) when nothing is new.
+    """
+    if ledger is None:
+        return records, None
+    fresh = ledger.filter_new(base, records)
+    print(f"[{portfolio_name}] {len(fresh)} new record(s), {len(records) - len(fresh)} already pushed.", file=sys.stderr)
+    if not fresh:
+        return [], {"mode": "ledger", "submitted": 0, "skipped": len(records)}
+    return fresh, None
+
+
+def acknowledge_pushed(
+    base: str,
+    records: List[Dict[str, Any]],
+    result: Any,
+    ledger: Optional[PushLedger],
+) -> None:
+    """Record in the ledger the pushed records the API didn't reject."""
+    if ledger is None:
+        return
+    # Fallback summaries list rejected records; a plain server response means all went through.
+    failed = set(result.get("failed_indices", [])) if isinstance(result, dict) and "mode" in result else set()
+    ledger.acknowledge(base, [r for i, r in enumerate(records) if i not in failed])
+
+
+def push_records_stream(
+    client: PortfolioClient,
+    portfolio_name: str,
+    records: Iterable[Dict[str, Any]],
+    ledger: Optional[PushLedger] = None,
+) -> Any:
+    """
+    Upload `records` (e.g. a parser's iter_parse()) as one streamed NDJSON
+    request, sending each record as soon as it is produced. Sent records are
+    kept for the ledger and for replaying the body after a stale portfolio id.
+    """
+    from portfolio_client import PortfolioNotFoundError
+
+    seen = 0
+    sent: List[Dict[str, Any]] = []
+
+    def counted(it: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        nonlocal seen
+        for r in it:
+            seen += 1
+            yield r
+
+    def tracked(it: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        for r in it:
+            sent.append(r)
+            yield r
+
+    fresh = counted(records)
+    if ledger is not None:
+        fresh = ledger.iter_new(client.base, fresh)
+        # Don't open a request when there is nothing new to send.
+        first = next(fresh, None)
+        if first is None:
+            print(f"[{portfolio_name}] 0 new record(s), {seen} already pushed.", file=sys.stderr)
+            return {"mode": "ledger", "submitted": 0, "skipped": seen}
+        fresh = itertools.chain([first], fresh)
+    pending = tracked(fresh)
+
+    # The timer also covers the parsing that produces records while the request is open.
+    with stats.timer("push") as t:
+        portfolio_id = client.resolve_portfolio_id(portfolio_name)
+        try:
+            result = client.upsert_transactions_stream(portfolio_id, pending)
+        except PortfolioNotFoundError:
+            client.forget_portfolio_id(portfolio_name)
+            portfolio_id = client.resolve_portfolio_id(portfolio_name)
+            result = client.upsert_transactions_stream(portfolio_id, itertools.chain(list(sent), pending))
+        t.items = len(sent)
+
+    if ledger is not None:
+        print(f"[{portfolio_name}] {len(sent)} new record(s), {seen - len(sent)} already pushed.", file=sys.stderr)
+        ledger.acknowledge(client.base, sent)
+    return result
+
+
+async def push_records_async(
+    client: AsyncPortfolioClient,
+    portfolio_name: str,
+    records: List[Dict[str, Any]],
+    ledger: Optional[PushLedger] = None,
+) -> Any:
+    """asyncio version of push_records."""
+    from portfolio_client import PortfolioNotFoundError
+
+    records, skipped = select_new(client.base, portfolio_name, records, ledger)
+    if skipped is not None:
+        return skipped
+
+    portfolio_id = await client.resolve_portfolio_id(portfolio_name)
+    try:
+        result = await client.upsert_transactions(portfolio_id, records)
+    except PortfolioNotFoundError:
+        client.forget_portfolio_id(portfolio_name)
+        portfolio_id = await client.resolve_portfolio_id(portfolio_name)
+        result = await client.upsert_transactions(portfolio_id, records)
+
+    acknowledge_pushed(client.base, records, result, ledger)
+    return result
+
+
+async def push_all_async(
+    client: AsyncPortfolioClient,
+    batches: Dict[str, List[Dict[str, Any]]],
+    ledger: Optional[PushLedger] = None,
+) -> Dict[str, Any]:
+    """Push every portfolio's records concurrently; returns {portfolio name: API result}."""
+    import asyncio
+
+    async with client:
+        results = await asyncio.gather(
+            *(push_records_async(client, name, records, ledger) for name, records in batches.items())
+        )
+    return dict(zip(batches, results))
 
 
 def main():
@@ -69,12 +295,23 @@ def main():
                     help="OAuth client credentials JSON downloaded from Google Cloud.")
     ap.add_argument("--token", type=Path, default=Path("token.json"),
                     help="Cached OAuth token (created on first run).")
+    ap.add_argument("--gmail-discovery-doc", type=Path, default=None,
+                    help="Gmail API discovery document (JSON) to build the client from "
+                         "(default: the copy bundled with google-api-python-client; never fetched online).")
+    ap.add_argument("--no-field-masks", dest="field_masks", action="store_false",
+                    help="Request full Gmail API responses instead of partial ones (fields masks), e.g. to debug a mask.")
+    ap.add_argument("--gmail-quota-units", type=float, default=250.0,
+                    help="Gmail quota units per second to pace requests to (Gmail's per-user limit is 250; 0 = no pacing).")
+    ap.add_argument("--gmail-max-retries", type=int, default=5,
+                    help="Retries of rate-limited (429, 403 rateLimitExceeded) or failed (5xx) Gmail requests.")
     ap.add_argument("--save-dir", type=Path, default=Path("downloads"),
                     help="Where to save downloaded artifacts (PDFs or message bodies).")
     ap.add_argument("--source", choices=["cathay_us", "cathay_tw", "schwab", "all"], default="cathay_us",
                     help="Which source to parse.")
     ap.add_argument("--pdf-password", dest="pdf_password", default=None,
                     help="Password for protected PDFs (TW/US if required).")
+    ap.add_argument("--from-dir", type=Path, default=None,
+                    help="Parse saved PDF/.html/.txt/.eml files under this directory instead of fetching from Gmail.")
     ap.add_argument("--trace-back-days", type=int, default=100,
                     help="Limit Gmail search to newer_than:{days}d.")
     # Backwards-compatible alias (common typo): --trace-back-day
@@ -86,13 +323,87 @@ def main():
                     help="Portfolio API base URL. Can also be set via PORTFOLIO_API_BASE environment variable.")
     ap.add_argument("--push", action="store_true",
                     help="If set, push parsed trades to the portfolio API; otherwise print JSON for debugging.")
+    ap.add_argument("--api-shape-cache", type=Path, default=Path(".portfolio_api_shapes.json"),
+                    help="Remembers which transaction payload shape the API accepted, per API base URL.")
+    ap.add_argument("--portfolio-id-cache", type=Path, default=None,
+                    help="Persist portfolio name -> id lookups here across runs (in-memory only if unset).")
+    ap.add_argument("--api-chunk-size", type=int, default=None,
+                    help="Upload transactions in chunks of N records (default: one request).")
+    ap.add_argument("--api-max-in-flight", type=int, default=4,
+                    help="Max concurrent upload requests (chunks or per-item fallback).")
+    ap.add_argument("--api-retry-upserts", action="store_true",
+                    help="Retry transaction uploads on 429/5xx and connection errors. Only safe if the server "
+                         "deduplicates upserted transactions (a retried request may already have been applied).")
+    ap.add_argument("--ledger", type=Path, default=None,
+                    help="SQLite ledger of acknowledged records; only new or changed records are pushed.")
+    # The asyncio client has no streamed upload, so the two don't combine.
+    upload_mode = ap.add_mutually_exclusive_group()
+    upload_mode.add_argument("--stream-upload", action="store_true",
+                             help="Upload transactions as one streamed, gzip-compressed NDJSON request (server must support it).")
+    upload_mode.add_argument("--async-push", action="store_true",
+                             help="With --source all --push, push all portfolios concurrently over asyncio once parsing is done.")
+    ap.add_argument("--reprobe-api", action="store_true",
+                    help="Ignore the remembered payload shape and probe the API again.")
     ap.add_argument("--keep-artifacts", action="store_true",
                     help="Keep downloaded/saved artifacts (HTML/TXT/PDF) for debugging.")
+    ap.add_argument("--download-workers", type=int, default=4,
+                    help="Max concurrent attachment downloads (1 = serial).")
+    ap.add_argument("--cache-dir", type=Path, default=None,
+                    help="Cache downloaded Gmail messages/attachments here across runs (disabled if unset).")
+    ap.add_argument("--cache-max-mb", type=int, default=512,
+                    help="Size limit of --cache-dir; least recently used entries are evicted first.")
+    ap.add_argument("--result-cache", type=Path, default=None,
+                    help="SQLite file caching parsed PDF statements by content hash (disabled if unset).")
+    ap.add_argument("--workers", type=int, default=1,
+                    help="Parse PDF statements in N worker processes (1 = in-process).")
+    ap.add_argument("--concurrent", action="store_true",
+                    help="With --source all, fetch and parse all sources in parallel; each pushes as soon as it's done.")
+    ap.add_argument("--incremental", action="store_true",
+                    help="Only fetch mail added since the previous run (Gmail historyId checkpoints).")
+    ap.add_argument("--stats", action="store_true",
+                    help="Print time and counts per source and stage (search, fetch, download, Gmail throttling, parsing, push) at the end (to stderr).")
+    ap.add_argument("--stats-json", type=Path, default=None,
+                    help="Write the same stats as JSON to this file ('-' for stdout, with --push only).")
+    ap.add_argument("--sync-state", type=Path, default=Path("sync_state.json"),
+                    help="Where --incremental keeps its per-source checkpoints.")
 
     args = ap.parse_args()
+    if str(args.stats_json) == "-" and not args.push:
+        ap.error("--stats-json - would mix with the records printed to stdout; give a file, or use --push")
+    started = time.perf_counter()
+    stats.STATS.enabled = args.stats or args.stats_json is not None
+
+    # Gmail helper (not needed when parsing a local archive)
+    gmail = None
+    if args.from_dir is None:
+        from gmail_helper import GmailHelper
+        from gmail_quota import GmailQuota
+
+        cache = None
+        if args.cache_dir:
+            from artifact_cache import ArtifactCache
+
+            cache = ArtifactCache(args.cache_dir, max_bytes=args.cache_max_mb * 1024 * 1024)
+        gmail = GmailHelper(
+            credentials_path=args.credentials,
+            token_path=args.token,
+            download_workers=args.download_workers,
+            cache=cache,
+            discovery_document=args.gmail_discovery_doc,
+            field_masks=args.field_masks,
+            quota=GmailQuota(units_per_sec=args.gmail_quota_units, max_retries=args.gmail_max_retries),
+        )
+
+    sync_state = None
+    if args.incremental and gmail is not None:
+        from sync_state import SyncState
 
-    # Gmail helper
-    gmail = GmailHelper(credentials_path=args.credentials, token_path=args.token)
+        sync_state = SyncState(args.sync_state)
+    result_cache = None
+    if args.result_cache:
+        from result_cache import ResultCache
+
+        result_cache = ResultCache(args.result_cache)
 
     parsers = build_parsers(
         gmail=gmail,
@@ -100,6 +411,11 @@ def main():
         pdf_password=args.pdf_password,
         trace_back_days=args.trace_back_days,
         keep_artifacts=args.keep_artifacts,
+        sync_state=sync_state,
+        result_cache=result_cache,
+        workers=args.workers,
+        share_cathay_fetch=args.source == "all" and gmail is not None,
+        sources=SOURCES if args.source == "all" else [args.source],
     )
 
     # Default portfolio names inferred from source
@@ -111,38 +427,121 @@ def main():
 
     # Setup API client if pushing
     client = None
+    ledger = None
     if args.push:
         if not args.api_base:
             raise RuntimeError("Missing --api-base (or PORTFOLIO_API_BASE env).")
-        client = PortfolioClient(base_url=args.api_base)
+        from portfolio_client import PortfolioClient, PortfolioIdCache, UploadShapeCache
+
+        client = PortfolioClient(
+            base_url=args.api_base,
+            shape_cache=UploadShapeCache(args.api_shape_cache),
+            id_cache=PortfolioIdCache(args.portfolio_id_cache),
+            chunk_size=args.api_chunk_size,
+            max_in_flight=args.api_max_in_flight,
+            retry_upserts=args.api_retry_upserts,
+        )
+        if args.reprobe_api:
+            client.shape_cache.forget(client.base)
+        if args.ledger:
+            from push_ledger import PushLedger
+
+            ledger = PushLedger(args.ledger)
+    async_push = args.push and args.async_push and args.source == "all"
 
     if args.source == "all":
+        sources = list(SOURCES)
+        timings: Dict[str, Tuple[float, float]] = {}
         total = 0
-        for src in ["cathay_us", "cathay_tw", "schwab"]:
-            records = run_single(src, parsers)
+        run_start = time.perf_counter()
+        queued: Dict[str, List[Dict[str, Any]]] = {}
+
+        def handle(src: str, records: List[Dict[str, Any]], parse_secs: float) -> None:
+            nonlocal total
             pname = default_portfolio_names[src]
             # Add portfolio name as metadata on each record (harmless; server may ignore)
             for r in records:
                 r["portfolio_name"] = pname
 
+            if async_push:
+                # Pushed together with the other sources below.
+                queued[src] = records
+                timings[src] = (parse_secs, 0.0)
+                total += len(records)
+                return
+
+            push_start = time.perf_counter()
             if args.push:
-                result = push_records(client, pname, records)
+                with stats.source(src):
+                    result = push_records(client, pname, records, ledger, stream=args.stream_upload)
                 print(f"[{src}] API response (truncated): {json.dumps(result, ensure_ascii=False)[:500]}")
             else:
-                print(f"[{src}] Parsed {len(records)} record(s):")
+                print(f"[{src}] Parsed {len(records)} record(s):", file=sys.stderr)
                 print(json.dumps(records, indent=2, ensure_ascii=False))
+            parsers[src].commit_sync()
+            timings[src] = (parse_secs, time.perf_counter() - push_start)
             total += len(records)
-        print(f"Done. Parsed a total of {total} record(s) across all sources.")
+
+        if args.concurrent:
+            # Sources fetch/parse on worker threads; results are pushed here as they finish.
+            with ThreadPoolExecutor(max_workers=len(sources)) as pool:
+                futures = {pool.submit(run_timed, src, parsers, args.from_dir): src for src in sources}
+                for fut in as_completed(futures):
+                    handle(futures[fut], *fut.result())
+        else:
+            for src in sources:
+                handle(src, *run_timed(src, parsers, args.from_dir))
+
+        if async_push:
+            import asyncio
+            from async_portfolio_client import AsyncPortfolioClient
+
+            push_start = time.perf_counter()
+            aclient = AsyncPortfolioClient(
+                base_url=args.api_base,
+                shape_cache=client.shape_cache,
+                id_cache=client.id_cache,
+                chunk_size=args.api_chunk_size,
+                max_in_flight=args.api_max_in_flight,
+                retry_upserts=args.api_retry_upserts,
+            )
+            batches = {default_portfolio_names[src]: queued[src] for src in queued}
+            # The pushes overlap, so their time is recorded once rather than per source.
+            with stats.timer("push", items=sum(len(r) for r in batches.values())):
+                results = asyncio.run(push_all_async(aclient, batches, ledger))
+            push_secs = time.perf_counter() - push_start
+            for src in queued:
+                result = results[default_portfolio_names[src]]
+                print(f"[{src}] API response (truncated): {json.dumps(result, ensure_ascii=False)[:500]}")
+                parsers[src].commit_sync()
+                timings[src] = (timings[src][0], push_secs)
+
+        print(f"Done. Parsed a total of {total} record(s) across all sources "
+              f"in {time.perf_counter() - run_start:.1f}s.", file=sys.stderr)
+        for src in sources:
+            parse_secs, push_secs = timings[src]
+            stage = "push" if args.push else "print"
+            print(f"  {src:<10} parse {parse_secs:6.1f}s  {stage} {push_secs:6.1f}s", file=sys.stderr)
     else:
-        records = run_single(args.source, parsers)
+        # Records are printed/streamed while later messages are still being fetched.
         pname = default_portfolio_names[args.source]
-        for r in records:
-            r["portfolio_name"] = pname
-        if args.push:
-            result = push_records(client, pname, records)
-            print(f"[{args.source}] API response (truncated): {json.dumps(result, ensure_ascii=False)[:500]}")
+        with stats.source(args.source):
+            records = stamp_portfolio(iter_single(args.source, parsers, args.from_dir), pname)
+            if args.push:
+                result = push_records(client, pname, records, ledger, stream=args.stream_upload)
+                print(f"[{args.source}] API response (truncated): {json.dumps(result, ensure_ascii=False)[:500]}")
+            else:
+                print_records(records)
+        parsers[args.source].commit_sync()
+
+    if args.stats:
+        print(stats.STATS.table(), file=sys.stderr)
+    if args.stats_json:
+        report = stats.STATS.to_json(source=args.source, wall_seconds=round(time.perf_counter() - started, 3))
+        if str(args.stats_json) == "-":
+            print(report)
         else:
-            print(json.dumps(records, indent=2, ensure_ascii=False))
+            args.stats_json.write_text(report + "\n", encoding="utf-8")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Tuple, Union
+import multiprocessing
+import sqlite3
+import sys
+
+from result_cache import ResultCache
+import stats
+
+ParseOutcome = Union[List[Dict[str, Any]], Exception]
+
+# Set in each worker process by _init_worker.
+_worker_parser = None
+
+
+def _init_worker(parser_cls, password, cache_path, stats_enabled=False) -> None:
+    global _worker_parser
+    cache = None
+    if cache_path:
+        try:
+            cache = ResultCache(cache_path)
+        except sqlite3.Error as e:  # parse without the cache rather than fail every file
+            print(f"Warning: result cache {cache_path} unavailable in worker: {e}", file=sys.stderr)
+    _worker_parser = parser_cls(gmail=None, save_dir=".", password=password, result_cache=cache)
+    stats.STATS.enabled = stats_enabled
+
+
+def _parse_in_worker(pdf_path: Path) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    # Stats are per task, so the parent can merge each snapshot exactly once.
+    stats.STATS.reset()
+    rows = _worker_parser._parse_pdf_cached(pdf_path)
+    return rows, stats.STATS.snapshot()
+
+
+def parse_pdfs(parser, paths: Iterable[Path], workers: int = 1) -> Iterator[Tuple[Path, ParseOutcome]]:
+    """
+    Run parser._parse_pdf_cached over `paths`, yielding (path, rows) in input
+    order, or (path, exception) for a file that failed. `paths` may be a
+    generator (e.g. files still downloading); results are yielded as soon as
+    they are ready.
+
+    With workers > 1 the files are parsed in a ProcessPoolExecutor, since
+    pdfplumber layout analysis is CPU-bound and serialized by the GIL. Each
+    worker builds its own Gmail-less parser of the same class and opens its
+    own connection to the parser's result cache. Workers are spawned, not
+    forked: the caller may have download or source threads running, and a
+    fork taken while one of them holds a lock (stats, stderr) would deadlock
+    the child.
+    """
+    if workers <= 1:
+        for p in paths:
+            try:
+                yield p, parser._parse_pdf_cached(p)
+            except Exception as e:
+                yield p, e
+        return
+
+    cache_path = parser.result_cache.path if parser.result_cache is not None else None
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(type(parser), parser.password, cache_path, stats.STATS.enabled),
+    ) as pool:
+        pending: Deque[Tuple[Path, Future]] = deque()
+        for p in paths:
+            pending.append((p, pool.submit(_parse_in_worker, p)))
+            while pending and pending[0][1].done():
+                yield _outcome(*pending.popleft())
+        while pending:
+            yield _outcome(*pending.popleft())
+
+
+def _outcome(path: Path, fut: Future) -> Tuple[Path, ParseOutcome]:
+    try:
+        rows, worker_stats = fut.result()
+    except Exception as e:
+        return path, e
+    stats.STATS.merge(worker_stats)
+    return path, rows
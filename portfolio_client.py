@@ -1,5 +1,15 @@
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Dict, Any, Optional, Tuple, Union
+import json
+import os
+import threading
+import time
+import zlib
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 
 class PortfolioClient:
@@ -14,16 +24,77 @@ class PortfolioClient:
               a) {"transactions": [ ... ]}  (preferred bulk form), OR
               b) [ ... ]                     (raw list), OR
               c) single-object POST per transaction (fallback loop)
+            or, with upsert_transactions_stream, gzip-compressed NDJSON
+
+    All calls share one pooled, keep-alive requests.Session. GETs are retried
+    with exponential backoff on connection errors and 429/502/503/504
+    responses. POSTs are not, since creating a portfolio twice makes two;
+    pass retry_upserts=True if the server deduplicates transaction upserts
+    to retry those too (see _post).
     """
 
-    def __init__(self, base_url: str, timeout: int = 20):
+    # Bulk payload shapes, in probing order: {"transactions": [...]}, then [...]
+    BULK_SHAPES = ("wrapped", "list")
+    RETRY_STATUSES = (429, 502, 503, 504)
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout: int = 20,
+        session: Optional[requests.Session] = None,
+        pool_size: int = 10,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        shape_cache: Optional["UploadShapeCache"] = None,
+        id_cache: Optional["PortfolioIdCache"] = None,
+        chunk_size: Optional[int] = None,
+        max_in_flight: int = 4,
+        retry_upserts: bool = False,
+    ):
         self.base = base_url.rstrip("/")
         self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        # Only safe when the server deduplicates transaction upserts.
+        self.retry_upserts = retry_upserts
+        # Records per bulk request (None: everything in one request)
+        self.chunk_size = chunk_size
+        # Concurrent requests for chunks and per-item fallback
+        self.max_in_flight = max(1, max_in_flight)
+        self.session = session or self._build_session(max(pool_size, self.max_in_flight), max_retries, backoff_factor)
+        # Streamed uploads can't be replayed; see upsert_transactions_stream.
+        self._stream_session: Optional[requests.Session] = None
+        self.shape_cache = shape_cache or UploadShapeCache()
+        self.id_cache = id_cache or PortfolioIdCache()
+
+    @classmethod
+    def _build_session(cls, pool_size: int, max_retries: int, backoff_factor: float) -> requests.Session:
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=cls.RETRY_STATUSES,
+            # Reads only: a replayed POST may have been committed already.
+            # (Failed connects are retried for every method; nothing was sent.)
+            allowed_methods=frozenset({"GET"}),
+            respect_retry_after_header=True,
+            # Hand the final error response back; callers inspect status codes.
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def close(self) -> None:
+        self.session.close()
+        if self._stream_session is not None:
+            self._stream_session.close()
 
     # ---------- portfolios ----------
 
     def list_portfolios(self) -> List[Dict[str, Any]]:
-        r = requests.get(f"{self.base}/portfolios", timeout=self.timeout)
+        r = self.session.get(f"{self.base}/portfolios", timeout=self.timeout)
         r.raise_for_status()
         data = r.json()
         if isinstance(data, list):
@@ -35,7 +106,7 @@ class PortfolioClient:
         return []
 
     def create_portfolio(self, name: str) -> Dict[str, Any]:
-        r = requests.post(f"{self.base}/portfolios", json={"name": name}, timeout=self.timeout)
+        r = self.session.post(f"{self.base}/portfolios", json={"name": name}, timeout=self.timeout)
         r.raise_for_status()
         return r.json()
 
@@ -45,51 +116,303 @@ class PortfolioClient:
                 return p
         return self.create_portfolio(name)
 
+    def resolve_portfolio_id(self, name: str) -> str:
+        """
+        Id of the portfolio called `name`, creating it if needed. Served from
+        id_cache when possible, so steady-state pushes skip the list call.
+        """
+        key = f"{self.base} {name}"
+        portfolio_id = self.id_cache.get(key)
+        if portfolio_id:
+            return portfolio_id
+
+        portfolio = self.get_or_create_portfolio(name)
+        portfolio_id = (
+            portfolio.get("id")
+            or portfolio.get("portfolio_id")
+            or portfolio.get("data", {}).get("id")
+        )
+        if not portfolio_id:
+            raise RuntimeError(f"Unable to determine portfolio id from response: {portfolio}")
+        portfolio_id = str(portfolio_id)
+        self.id_cache.set(key, portfolio_id)
+        return portfolio_id
+
+    def forget_portfolio_id(self, name: str) -> None:
+        self.id_cache.forget(f"{self.base} {name}")
+
     # ---------- transactions ----------
 
-    def upsert_transactions(self, portfolio_id: str, transactions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def upsert_transactions(
+        self,
+        portfolio_id: str,
+        transactions: List[Dict[str, Any]],
+        reprobe: bool = False,
+    ) -> Dict[str, Any]:
         """
         POST to /portfolios/{id}/transactions with smart fallbacks:
           1) Try {"transactions": [...]}
           2) Try raw list: [...]
           3) Fallback to posting each transaction individually (loop)
-        Returns the successful response or a summary dict if falling back.
+        The shape that worked is remembered per base URL (see UploadShapeCache)
+        and used directly next time; pass reprobe=True to start from 1) again.
+        Only 4xx rejections change what is remembered: when the known shape
+        is rejected, one-record probes decide between a bad record (isolated
+        by bisection) and a server that changed. An upload that fails with a
+        5xx, 429 or connection error is reported as failed ("unavailable").
+        With chunk_size set, larger uploads are split into chunks sent up to
+        max_in_flight at a time (see _upsert_chunked).
+        Returns the successful response or a summary dict if falling back; the
+        summary's "failed_indices" lists the positions of rejected records.
+        Raises PortfolioNotFoundError if the server doesn't know `portfolio_id`.
         """
         url = f"{self.base}/portfolios/{portfolio_id}/transactions"
 
-        # 1) Preferred: wrapper object
+        known = None if reprobe else self.shape_cache.get(self.base)
+        if known == "single":
+            return self._upsert_single_mode(url, transactions)
+        if self.chunk_size and len(transactions) > self.chunk_size:
+            return self._upsert_chunked(url, transactions, known)
+        if known in self.BULK_SHAPES:
+            ok, value = self._post_bulk(url, transactions, known)
+            if ok:
+                return value
+            if not self._rejected(value):
+                # Overloaded or unreachable: says nothing about the shape.
+                return self._unavailable_summary(transactions, value)
+
+        # 1) Preferred: wrapper object, then 2) raw list
         try:
-            r = requests.post(url, json={"transactions": transactions}, timeout=self.timeout)
-            if r.status_code < 400:
-                return r.json()
-            # If server explicitly doesn't like wrapper, continue to fallback
-        except requests.RequestException:
-            pass
-
-        # 2) Raw list
+            probe = self._probe_shape(url, transactions, tried=known)
+        except UploadUnavailableError as e:
+            return self._unavailable_summary(transactions, e.failure)
+        if probe is None:
+            # 3) One-by-one fallback
+            return self._upsert_single_mode(url, transactions, probing=True)
+        shape, value, index = probe
+        self.shape_cache.set(self.base, shape)
+        if index is None:
+            return value
+        # The shape works; some records don't. Isolate them.
+        rest = transactions[:index] + transactions[index + 1:]
+        results, errors = self._send_chunk(url, rest, shape)
+        return self._chunked_summary(transactions, shape, 1, [value] + results, errors)
+
+    def upsert_transactions_stream(
+        self,
+        portfolio_id: str,
+        transactions: Iterable[Dict[str, Any]],
+        compresslevel: int = 6,
+    ) -> Dict[str, Any]:
+        """
+        POST transactions as gzip-compressed NDJSON (one JSON object per line)
+        with chunked transfer encoding. `transactions` may be any iterable,
+        including a generator: records are serialized and compressed as they
+        are consumed, so the full payload never exists in memory.
+        The server must accept Content-Type application/x-ndjson with
+        Content-Encoding gzip; there is no shape fallback.
+
+        A streamed body can't be replayed, so the request is sent without
+        retries or redirects (on a session of its own), and any non-2xx
+        response raises: PortfolioNotFoundError for 404, else requests.HTTPError.
+        """
+        url = f"{self.base}/portfolios/{portfolio_id}/transactions"
+        if self._stream_session is None:
+            self._stream_session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=0)
+            self._stream_session.mount("http://", adapter)
+            self._stream_session.mount("https://", adapter)
+        r = self._stream_session.post(
+            url,
+            data=self._gzip_ndjson(transactions, compresslevel),
+            headers={"Content-Type": "application/x-ndjson", "Content-Encoding": "gzip"},
+            timeout=self.timeout,
+            allow_redirects=False,
+        )
+        if r.status_code == 404:
+            raise PortfolioNotFoundError(f"{url}: {r.text[:300]}")
+        if not 200 <= r.status_code < 300:
+            raise requests.HTTPError(f"{r.status_code} from {url}: {r.text[:300]}", response=r)
         try:
-            r = requests.post(url, json=transactions, timeout=self.timeout)
-            if r.status_code < 400:
-                return r.json()
-        except requests.RequestException:
-            pass
+            return r.json()
+        except ValueError:
+            return {"status": r.status_code}
 
-        # 3) One-by-one fallback
+    @staticmethod
+    def _gzip_ndjson(records: Iterable[Dict[str, Any]], compresslevel: int = 6) -> Iterator[bytes]:
+        # wbits=31 selects the gzip container
+        comp = zlib.compressobj(compresslevel, zlib.DEFLATED, 31)
+        for rec in records:
+            out = comp.compress(json.dumps(rec, ensure_ascii=False).encode("utf-8") + b"\n")
+            if out:
+                yield out
+        yield comp.flush()
+
+    def _upsert_chunked(
+        self,
+        url: str,
+        transactions: List[Dict[str, Any]],
+        shape: Optional[str],
+    ) -> Dict[str, Any]:
+        """
+        Send `transactions` as chunks of chunk_size, up to max_in_flight at once.
+        An unknown shape is probed with the first chunk only. A rejected chunk
+        is bisected until the offending records are isolated, so one bad
+        record costs a few extra requests instead of a per-item fallback; a
+        chunk that fails transiently is reported failed as a whole.
+        """
+        chunks = [transactions[i:i + self.chunk_size] for i in range(0, len(transactions), self.chunk_size)]
         results: List[Any] = []
         errors: List[Dict[str, Any]] = []
-        for t in transactions:
+
+        pending = chunks
+        if shape not in self.BULK_SHAPES:
             try:
-                rr = requests.post(url, json=t, timeout=self.timeout)
-                if rr.status_code < 400:
-                    # Some APIs return the created transaction, others return {id: ...} or 204
-                    try:
-                        results.append(rr.json())
-                    except ValueError:
-                        results.append({"status": rr.status_code})
-                else:
-                    errors.append({"transaction": t, "status": rr.status_code, "text": rr.text[:300]})
-            except requests.RequestException as ex:
-                errors.append({"transaction": t, "error": str(ex)[:300]})
+                probe = self._probe_shape(url, chunks[0])
+            except UploadUnavailableError as e:
+                return self._unavailable_summary(transactions, e.failure)
+            if probe is None:
+                return self._upsert_single_mode(url, transactions, probing=True)
+            shape, value, index = probe
+            self.shape_cache.set(self.base, shape)
+            results.append(value)
+            rest = chunks[0][:index] + chunks[0][index + 1:] if index is not None else []
+            pending = ([rest] if rest else []) + chunks[1:]
+
+        for chunk_results, chunk_errors in self._map(lambda c: self._send_chunk(url, c, shape), pending):
+            results.extend(chunk_results)
+            errors.extend(chunk_errors)
+        if not results and all(self._rejected(e) for e in errors):
+            self.shape_cache.forget(self.base)
+        return self._chunked_summary(transactions, shape, len(chunks), results, errors)
+
+    def _probe_shape(
+        self,
+        url: str,
+        chunk: List[Dict[str, Any]],
+        tried: Optional[str] = None,
+    ) -> Optional[Tuple[str, Any, Optional[int]]]:
+        """
+        Find a bulk shape the server accepts. `tried` is a shape that just
+        rejected the whole chunk: it isn't sent again in full, but goes first
+        in the one-record check. Returns (shape, response, None) if the whole
+        chunk went through, (shape, response, index) if only the one-record
+        probe of chunk[index] did (the rest still has to be sent), or None if
+        no bulk shape works. Only 4xx rejections count as verdicts; anything
+        else raises UploadUnavailableError.
+        """
+        shapes = sorted(self.BULK_SHAPES, key=lambda s: s != tried)
+        for shape in shapes:
+            if shape == tried:
+                continue
+            ok, value = self._post_bulk(url, chunk, shape)
+            if ok:
+                return shape, value, None
+            self._check_rejected(value)
+        # Rejected in every shape: either a bad record or no bulk support.
+        # A few one-record bulk payloads tell the two apart cheaply.
+        for index in range(min(3, len(chunk)) if len(chunk) > 1 else 0):
+            for shape in shapes:
+                ok, value = self._post_bulk(url, [chunk[index]], shape)
+                if ok:
+                    return shape, value, index
+                self._check_rejected(value)
+        return None
+
+    def _send_chunk(
+        self,
+        url: str,
+        chunk: List[Dict[str, Any]],
+        shape: str,
+    ) -> Tuple[List[Any], List[Dict[str, Any]]]:
+        """
+        POST one chunk; if it is rejected (4xx), bisect it. A transient
+        failure (5xx, 429, connection error) fails the whole chunk unsplit
+        rather than multiplying requests to a struggling server.
+        Returns (responses, per-record errors).
+        """
+        ok, value = self._post_bulk(url, chunk, shape)
+        if ok:
+            return [value], []
+        if len(chunk) == 1 or not self._rejected(value):
+            return [], [dict(value, transaction=t) for t in chunk]
+        mid = len(chunk) // 2
+        left_results, left_errors = self._send_chunk(url, chunk[:mid], shape)
+        right_results, right_errors = self._send_chunk(url, chunk[mid:], shape)
+        return left_results + right_results, left_errors + right_errors
+
+    def _upsert_single_mode(
+        self,
+        url: str,
+        transactions: List[Dict[str, Any]],
+        probing: bool = False,
+    ) -> Dict[str, Any]:
+        summary = self._upsert_each(url, transactions)
+        if probing and summary["succeeded"]:
+            self.shape_cache.set(self.base, "single")
+        elif not probing and transactions and not summary["succeeded"]:
+            if all(self._rejected(e) for e in summary["sample_errors"]):
+                self.shape_cache.forget(self.base)
+        return summary
+
+    @classmethod
+    def _chunked_summary(
+        cls,
+        transactions: List[Dict[str, Any]],
+        shape: str,
+        chunks: int,
+        results: List[Any],
+        errors: List[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        return {
+            "mode": "chunked",
+            "shape": shape,
+            "chunks": chunks,
+            "submitted": len(transactions),
+            "succeeded": len(transactions) - len(errors),
+            "failed": len(errors),
+            "sample_results": results[:10],
+            "sample_errors": errors[:10],
+            "failed_indices": cls._failed_indices(transactions, errors),
+        }
+
+    @staticmethod
+    def _unavailable_summary(transactions: List[Dict[str, Any]], failure: Dict[str, Any]) -> Dict[str, Any]:
+        """Summary of an upload the server couldn't take (5xx, 429, timeout, connection error): nothing went through."""
+        return {
+            "mode": "unavailable",
+            "submitted": len(transactions),
+            "succeeded": 0,
+            "failed": len(transactions),
+            "sample_results": [],
+            "sample_errors": [dict(failure, transaction=t) for t in transactions[:10]],
+            "failed_indices": list(range(len(transactions))),
+        }
+
+    @staticmethod
+    def _rejected(failure: Dict[str, Any]) -> bool:
+        """
+        Did the server reject the payload (a 4xx such as 400/415/422)? A 5xx,
+        429, 408 or connection error ({"error": ...}) is transient instead and
+        says nothing about the payload or its shape.
+        """
+        status = failure.get("status")
+        return status is not None and 400 <= status < 500 and status not in (408, 429)
+
+    @classmethod
+    def _check_rejected(cls, failure: Dict[str, Any]) -> None:
+        if not cls._rejected(failure):
+            raise UploadUnavailableError(failure)
+
+    def _upsert_each(self, url: str, transactions: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """POST every transaction on its own, up to max_in_flight at once."""
+        results: List[Any] = []
+        errors: List[Dict[str, Any]] = []
+        for t, (ok, value) in zip(transactions, self._map(lambda t: self._post(url, t), transactions)):
+            if ok:
+                results.append(value)
+            else:
+                errors.append(dict(value, transaction=t))
         return {
             "mode": "per-item-fallback",
             "submitted": len(transactions),
@@ -97,4 +420,134 @@ class PortfolioClient:
             "failed": len(errors),
             "sample_results": results[:10],
             "sample_errors": errors[:10],
+            "failed_indices": self._failed_indices(transactions, errors),
         }
+
+    @staticmethod
+    def _failed_indices(transactions: List[Dict[str, Any]], errors: List[Dict[str, Any]]) -> List[int]:
+        """Positions in `transactions` of the records named by `errors`."""
+        position = {id(t): i for i, t in enumerate(transactions)}
+        return sorted(position[id(e["transaction"])] for e in errors)
+
+    def _post_bulk(self, url: str, transactions: List[Dict[str, Any]], shape: str) -> Tuple[bool, Any]:
+        body = {"transactions": transactions} if shape == "wrapped" else transactions
+        return self._post(url, body)
+
+    def _post(self, url: str, body: Any) -> Tuple[bool, Any]:
+        """
+        POST a JSON body (transaction upserts). Returns (True, response JSON)
+        when accepted, else (False, {"status", "text"} or {"error"}).
+        With retry_upserts, connection errors and RETRY_STATUSES responses are
+        retried with exponential backoff.
+        """
+        attempt = 0
+        while True:
+            try:
+                r = self.session.post(url, json=body, timeout=self.timeout)
+            except requests.RequestException as ex:
+                if not self.retry_upserts or attempt >= self.max_retries:
+                    return False, {"error": str(ex)[:300]}
+            else:
+                if r.status_code not in self.RETRY_STATUSES or not self.retry_upserts or attempt >= self.max_retries:
+                    break
+            time.sleep(self.backoff_factor * (2 ** attempt))
+            attempt += 1
+        if r.status_code == 404:
+            # Not a payload problem: no fallback shape will help.
+            raise PortfolioNotFoundError(f"{url}: {r.text[:300]}")
+        if r.status_code >= 400:
+            return False, {"status": r.status_code, "text": r.text[:300]}
+        # Some APIs return the created transaction, others return {id: ...} or 204
+        try:
+            return True, r.json()
+        except ValueError:
+            return True, {"status": r.status_code}
+
+    def _map(self, fn: Callable[[Any], Any], items: List[Any]) -> List[Any]:
+        """fn over items, in order, with at most max_in_flight running at once."""
+        if self.max_in_flight <= 1 or len(items) <= 1:
+            return [fn(x) for x in items]
+        with ThreadPoolExecutor(max_workers=min(self.max_in_flight, len(items))) as pool:
+            return list(pool.map(fn, items))
+
+
+class PortfolioNotFoundError(RuntimeError):
+    """The API answered 404 for a portfolio id (e.g. a stale cached id)."""
+
+
+class UploadUnavailableError(RuntimeError):
+    """
+    A probe upload failed for a reason other than its payload (5xx, 429,
+    timeout, connection error). upsert_transactions reports such uploads as
+    failed instead of drawing conclusions about the payload shape.
+    """
+
+    def __init__(self, failure: Dict[str, Any]):
+        super().__init__(failure.get("text") or failure.get("error") or str(failure.get("status")))
+        self.failure = failure
+
+
+class TTLFileCache:
+    """
+    Small key -> value store whose entries expire after `ttl` seconds. With
+    a `path` it is persisted as JSON; otherwise it lives in memory.
+    """
+
+    # Key the value was stored under in files written before this class
+    # existed (entries were {LEGACY_VALUE_KEY: value, "at": time}).
+    LEGACY_VALUE_KEY: Optional[str] = None
+
+    def __init__(self, path: Optional[Union[Path, str]] = None, ttl: float = 7 * 24 * 3600):
+        self.path = Path(path) if path else None
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._data: Dict[str, Dict[str, Any]] = {}
+        if self.path is not None and self.path.exists():
+            try:
+                self._data = json.loads(self.path.read_text(encoding="utf-8")) or {}
+            except (OSError, ValueError):
+                self._data = {}
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if not entry or time.time() - entry.get("at", 0) > self.ttl:
+                return None
+            if "value" not in entry and self.LEGACY_VALUE_KEY:
+                return entry.get(self.LEGACY_VALUE_KEY)
+            return entry.get("value")
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = {"value": value, "at": time.time()}
+            self._save()
+
+    def forget(self, key: str) -> None:
+        with self._lock:
+            if self._data.pop(key, None) is not None:
+                self._save()
+
+    def _save(self) -> None:
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(self._data, indent=2, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+class UploadShapeCache(TTLFileCache):
+    """
+    Remembers which transaction payload shape each server (base URL)
+    accepted: "wrapped" ({"transactions": [...]}), "list" ([...]) or
+    "single" (one object per POST).
+    """
+
+    LEGACY_VALUE_KEY = "shape"
+
+
+class PortfolioIdCache(TTLFileCache):
+    """Remembers portfolio name -> id per server, keyed "<base URL> <name>"."""
+
+    def __init__(self, path: Optional[Union[Path, str]] = None, ttl: float = 30 * 24 * 3600):
+        super().__init__(path, ttl)
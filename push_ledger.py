@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Union
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+# Fields that identify a pushed transaction (fee/currency are derived from these).
+FINGERPRINT_FIELDS = ("symbol", "trade_type", "date", "shares", "price", "total", "portfolio_name")
+
+
+def fingerprint(record: Dict[str, Any]) -> str:
+    """Stable hash of a normalized record: 10 == 10.0, surrounding whitespace ignored."""
+    norm = []
+    for field in FINGERPRINT_FIELDS:
+        v = record.get(field)
+        if isinstance(v, bool):
+            pass
+        elif isinstance(v, (int, float)):
+            v = round(float(v), 8)
+        elif isinstance(v, str):
+            v = v.strip()
+        norm.append(v)
+    return hashlib.sha256(json.dumps(norm, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class PushLedger:
+    """
+    SQLite record of transactions the portfolio API has acknowledged, keyed by
+    (API base URL, record fingerprint), so each run only uploads records that
+    are new or changed.
+    """
+
+    def __init__(self, path: Union[Path, str]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS pushed ("
+            " target TEXT NOT NULL,"
+            " fingerprint TEXT NOT NULL,"
+            " pushed_at REAL NOT NULL,"
+            " PRIMARY KEY (target, fingerprint))"
+        )
+        self._db.commit()
+
+    def filter_new(self, target: str, records: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Return the records `target` has not acknowledged yet, in order."""
+        return list(self.iter_new(target, records))
+
+    def iter_new(self, target: str, records: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Lazy filter_new: yields unacknowledged records as `records` produces them."""
+        with self._lock:
+            known = {
+                row[0]
+                for row in self._db.execute("SELECT fingerprint FROM pushed WHERE target = ?", (target,))
+            }
+        for r in records:
+            if fingerprint(r) not in known:
+                yield r
+
+    def acknowledge(self, target: str, records: Iterable[Dict[str, Any]]) -> None:
+        now = time.time()
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO pushed (target, fingerprint, pushed_at) VALUES (?, ?, ?)",
+                [(target, fingerprint(r), now) for r in records],
+            )
+            self._db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
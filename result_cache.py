@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+import hashlib
+import json
+import sqlite3
+import sys
+import threading
+
+
+def code_version(*source_files: Union[Path, str]) -> str:
+    """Fingerprint of the given source files; changes whenever the parsing code does."""
+    h = hashlib.sha256()
+    for f in source_files:
+        h.update(Path(f).read_bytes())
+    return h.hexdigest()[:16]
+
+
+def file_digest(path: Union[Path, str]) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class ResultCache:
+    """
+    SQLite cache of parsed trade records, keyed by
+    (parser name, parser code version, sha256 of the statement file).
+
+    Rows written by other versions of a parser are never read again and are
+    pruned the first time that parser stores a result.
+
+    Several processes (pdf_pool workers) may share one file: it is opened in
+    WAL mode and writers wait up to `timeout` seconds for each other. The
+    cache is an optimization only, so get_or_parse treats a failed read as a
+    miss and a failed write as a warning.
+    """
+
+    def __init__(self, path: Union[Path, str], timeout: float = 30.0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._pruned = set()
+        self._db = sqlite3.connect(str(self.path), timeout=timeout, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " parser TEXT NOT NULL,"
+            " version TEXT NOT NULL,"
+            " digest TEXT NOT NULL,"
+            " records TEXT NOT NULL,"
+            " PRIMARY KEY (parser, version, digest))"
+        )
+        self._db.commit()
+
+    def get(self, parser: str, version: str, digest: str) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT records FROM results WHERE parser = ? AND version = ? AND digest = ?",
+                (parser, version, digest),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, parser: str, version: str, digest: str, records: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            if (parser, version) not in self._pruned:
+                self._db.execute(
+                    "DELETE FROM results WHERE parser = ? AND version <> ?", (parser, version)
+                )
+                self._pruned.add((parser, version))
+            self._db.execute(
+                "INSERT OR REPLACE INTO results (parser, version, digest, records) VALUES (?, ?, ?, ?)",
+                (parser, version, digest, json.dumps(records, ensure_ascii=False)),
+            )
+            self._db.commit()
+
+    def get_or_parse(
+        self,
+        parser: str,
+        version: str,
+        path: Union[Path, str],
+        parse: Callable[[Path], List[Dict[str, Any]]],
+    ) -> List[Dict[str, Any]]:
+        """Return cached records for the file's content, or parse it and store the result."""
+        digest = file_digest(path)
+        try:
+            records = self.get(parser, version, digest)
+        except sqlite3.Error as e:
+            print(f"Warning: result cache read failed for {path}: {e}", file=sys.stderr)
+            records = None
+        if records is None:
+            records = parse(Path(path))
+            try:
+                self.put(parser, version, digest, records)
+            except sqlite3.Error as e:
+                print(f"Warning: result cache write failed for {path}: {e}", file=sys.stderr)
+        return records
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
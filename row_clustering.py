@@ -0,0 +1,49 @@
+from typing import Any, Dict, Iterable, List
+
+import stats
+
+
+def cluster_rows(words: Iterable[Dict[str, Any]], y_tol: float, inclusive: bool = True) -> List[str]:
+    """
+    Group pdfplumber words into text lines by their `top` coordinate and read
+    each line left to right.
+
+    Words are sorted by `top` once and swept in that order. A word joins the
+    first open row whose running-mean y is within `y_tol` of it (`<=` when
+    `inclusive`, `<` otherwise), else it starts a new row. `top` only grows
+    during the sweep, so a row whose mean has fallen more than `y_tol` behind
+    can never match again and is closed; each word is only compared with the
+    few rows overlapping its band instead of every row on the page.
+    """
+    with stats.timer("cluster_rows") as t:
+        lines = _sweep(words, y_tol, inclusive)
+        t.items = len(lines)
+    return lines
+
+
+def _sweep(words: Iterable[Dict[str, Any]], y_tol: float, inclusive: bool) -> List[str]:
+    rows: List[Dict[str, Any]] = []
+    open_rows: List[Dict[str, Any]] = []
+    for w in sorted(words, key=lambda w: w["top"]):
+        top = w["top"]
+        if open_rows and top - open_rows[0]["y"] > y_tol:
+            open_rows = [row for row in open_rows if top - row["y"] <= y_tol]
+        for row in open_rows:
+            d = abs(row["y"] - top)
+            if d <= y_tol if inclusive else d < y_tol:
+                row["words"].append(w)
+                row["y"] = (row["y"] * row["n"] + top) / (row["n"] + 1)
+                row["n"] += 1
+                break
+        else:
+            row = {"y": top, "n": 1, "words": [w]}
+            rows.append(row)
+            open_rows.append(row)
+
+    lines: List[str] = []
+    for row in rows:
+        cells = sorted(row["words"], key=lambda w: w["x0"])
+        text = " ".join(w["text"] for w in cells)
+        # normalize whitespace
+        lines.append(" ".join(text.split()))
+    return lines
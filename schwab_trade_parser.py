@@ -1,15 +1,20 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple, Union
+from typing import Iterable, Iterator, List, Dict, Any, Optional, Tuple, Union
+from email.utils import parseaddr
 import base64
 import re
 import shutil
+import sys
 
 from bs4 import BeautifulSoup  # requires bs4 at runtime
 
 from trade_parser import TradeParser
 from gmail_helper import GmailHelper
+from sync_state import SyncState
+import local_files
+import stats
 
 
 class SchwabTradeParser(TradeParser):
@@ -22,47 +27,61 @@ class SchwabTradeParser(TradeParser):
     Returns a list of JSON records compatible with the other parsers.
     """
     DEFAULT_QUERY = 'from:(donotreply@mail.schwab.com) eConfirms'
+    # Saved message bodies read by parse_files/parse_directory (plus .eml).
+    BODY_SUFFIXES = (".html", ".htm", ".txt")
+    # How find_files tells Schwab files from other sources' in a shared
+    # archive: the prefix iter_parse saves bodies under, or a Schwab sender.
+    FILE_PREFIX = "schwab_"
+    SENDER_DOMAIN = "schwab.com"
 
     def __init__(
         self,
-        gmail: GmailHelper,
+        gmail: Optional[GmailHelper],
         save_dir: Union[Path, str],
         trace_back_days: Optional[int] = None,
         keep_artifacts: bool = False,
+        sync_state: Optional[SyncState] = None,
     ) -> None:
         self.gmail = gmail
         self.save_dir = Path(save_dir)
         self.keep_artifacts = keep_artifacts
+        self.sync_state = sync_state
+        self.sync_key = "schwab"
         if trace_back_days is not None and trace_back_days > 0:
             self.query = f"{self.DEFAULT_QUERY} newer_than:{trace_back_days}d"
         else:
             self.query = self.DEFAULT_QUERY
 
     # ---------- public API ----------
-    def parse(self) -> List[Dict[str, Any]]:
+    def iter_parse(self) -> Iterator[Dict[str, Any]]:
         """
-        Search, fetch HTML bodies, parse them, and return normalized rows.
+        Search, fetch HTML bodies, parse them, and yield normalized rows
+        message by message.
         """
         self.save_dir.mkdir(parents=True, exist_ok=True)
-        msg_ids = self.gmail.search_messages("me", self.query)
+        self._incomplete = False
+        msg_ids, self._pending_history_id = self.gmail.search_messages_incremental(
+            "me", self.query, self.sync_state, self.sync_key
+        )
         if not msg_ids:
-            print("Schwab: No messages found matching query.")
-            return []
-
-        all_rows: List[Dict[str, Any]] = []
-        for mid in msg_ids:
-            html, text = self._get_message_bodies(mid)
+            print("Schwab: No messages found matching query.", file=sys.stderr)
+            return
+
+        body_fields = self.gmail.mask(GmailHelper.BODY_FIELDS)
+        failed: List[str] = []
+        # Window by window, so rows come out while later windows are still being fetched.
+        batches = self.gmail._iter_message_batches("me", msg_ids, format="full", fields=body_fields, failed=failed)
+        for msg in (m for batch in batches for m in batch):
+            mid = msg["id"]
+            html, text = self._get_message_bodies(mid, msg=msg)
             if not html and not text:
                 # Last resort: dump raw and skip parsing
-                raw = self.gmail.service.users().messages().get(
-                    userId="me",
-                    id=mid,
-                    format="raw"
-                ).execute()
+                raw = self.gmail.get_message("me", mid, format="raw", fields=self.gmail.mask(GmailHelper.RAW_FIELDS))
                 raw_bytes = base64.urlsafe_b64decode(raw.get("raw", "").encode("utf-8"))
                 eml_path = GmailHelper._unique_path(self.save_dir / f"schwab_{mid}.eml")
                 eml_path.write_bytes(raw_bytes)
-                print(f"Schwab: saved raw .eml for message {mid} (no parseable body).")
+                print(f"Schwab: saved raw .eml for message {mid} (no parseable body).", file=sys.stderr)
+                self._incomplete = True
                 continue
 
             # Optionally save a copy for debugging
@@ -74,29 +93,59 @@ class SchwabTradeParser(TradeParser):
                 path.write_text(text, encoding="utf-8")
 
             body_text = html or text or ""
-            rows = self._parse_body(body_text)
-            all_rows.extend(rows)
+            with stats.timer("match", items=1):
+                rows = self._parse_body(body_text)
+            yield from rows
+        if failed:
+            self._incomplete = True
 
         # remove the save_dir after successfully parsing
         if not self.keep_artifacts:
             try:
                 shutil.rmtree(self.save_dir)
             except Exception as e:
-                print(f"Warning: failed to remove temp dir {self.save_dir}: {e}")
+                print(f"Warning: failed to remove temp dir {self.save_dir}: {e}", file=sys.stderr)
+
+    def iter_parse_files(self, paths: Iterable[Union[Path, str]]) -> Iterator[Dict[str, Any]]:
+        """Parse saved eConfirm bodies (.html/.txt) or raw .eml messages without Gmail."""
+        for path in paths:
+            path = Path(path)
+            suffix = path.suffix.lower()
+            if suffix == ".eml":
+                html, text = local_files.eml_bodies(local_files.read_eml(path))
+                body_text = html or text or ""
+            elif suffix in self.BODY_SUFFIXES:
+                body_text = path.read_text(encoding="utf-8", errors="replace")
+            else:
+                continue
+            if not body_text:
+                print(f"Schwab: no parseable body in {path}.", file=sys.stderr)
+                continue
+            with stats.timer("match", items=1):
+                rows = self._parse_body(body_text)
+            yield from rows
+
+    def find_files(self, directory: Union[Path, str]) -> List[Path]:
+        return [p for p in local_files.list_files(directory, self.BODY_SUFFIXES + (".eml",)) if self._is_schwab_file(p)]
 
-        return all_rows
+    def _is_schwab_file(self, path: Path) -> bool:
+        if path.name.lower().startswith(self.FILE_PREFIX):
+            return True
+        if path.suffix.lower() != ".eml":
+            return False
+        domain = parseaddr(local_files.eml_sender(path))[1].rpartition("@")[2].lower()
+        return domain == self.SENDER_DOMAIN or domain.endswith("." + self.SENDER_DOMAIN)
 
     # ---------- internals ----------
-    def _get_message_bodies(self, msg_id: str) -> Tuple[Optional[str], Optional[str]]:
+    def _get_message_bodies(self, msg_id: str, msg: Optional[dict] = None) -> Tuple[Optional[str], Optional[str]]:
         """
         Return (html, text) bodies for the message, if present.
         Prefers parts labeled 'text/html' or 'text/plain'. Decodes base64url.
+        Pass `msg` (a format="full" message, or one fetched with
+        GmailHelper.BODY_FIELDS) to skip fetching it again.
         """
-        msg = self.gmail.service.users().messages().get(
-            userId="me",
-            id=msg_id,
-            format="full"
-        ).execute()
+        if msg is None:
+            msg = self.gmail.get_message("me", msg_id, format="full", fields=self.gmail.mask(GmailHelper.BODY_FIELDS))
         payload = msg.get("payload", {}) or {}
 
         html: Optional[str] = None
@@ -107,28 +156,14 @@ class SchwabTradeParser(TradeParser):
             mime = (part.get("mimeType") or "").lower()
             if mime not in ("text/html", "text/plain"):
                 continue
-            body = (part.get("body") or {})
-            data = body.get("data")
-            if not data:
-                # If attachmentId is present for a text part (rare), fetch it
-                att_id = body.get("attachmentId")
-                if att_id:
-                    att = (
-                        self.gmail.service.users()
-                        .messages()
-                        .attachments()
-                        .get(userId="me", messageId=msg_id, id=att_id)
-                        .execute()
-                    )
-                    data = att.get("data")
-            if not data:
-                continue
-
             try:
-                raw = base64.urlsafe_b64decode(data.encode("utf-8"))
-                decoded = raw.decode("utf-8", errors="replace")
-            except Exception:
+                # Inline body data, or an attachmentId for a text part (rare) that is fetched
+                raw = self.gmail.get_attachment_bytes("me", msg_id, part)
+            except ValueError:  # malformed base64
+                continue
+            if not raw:
                 continue
+            decoded = raw.decode("utf-8", errors="replace")
 
             if mime == "text/html":
                 html = (html or "") + decoded
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional, Tuple
+import json
+import threading
+import time
+
+# Source ("cathay_us", ...) the current thread/task is working for; set with source().
+_current_source: ContextVar[str] = ContextVar("stats_source", default="")
+
+# Innermost running timer as [seconds to leave out, enclosing timer's entry or None].
+_enclosing: ContextVar[Optional[list]] = ContextVar("stats_enclosing", default=None)
+
+# Waiting stages whose time is left out of the timers around them, so that
+# e.g. Gmail "throttle" sleeps inside a "fetch" are not counted in both.
+EXCLUSIVE_STAGES = frozenset({"throttle"})
+
+# Display order for the table; unknown stages sort after these.
+STAGES = (
+    "search", "fetch", "download", "throttle", "pdf_open", "extract_words",
+    "cluster_rows", "match", "project", "push",
+)
+
+
+class _Timing:
+    """Handed out by Stats.timer; set `items` to what the timed block processed."""
+
+    __slots__ = ("items",)
+
+    def __init__(self, items: int = 0) -> None:
+        self.items = items
+
+
+class Stats:
+    """
+    Wall time, call and item counts per (source, stage). Disabled by default,
+    in which case timer() and count() cost next to nothing. Timers nest;
+    time in EXCLUSIVE_STAGES is left out of every timer around it.
+
+    Threads and worker processes don't inherit the current source on their
+    own: submit thread-pool work through contextvars.copy_context().run, and
+    merge() snapshots taken in worker processes (their entries carry no
+    source and are credited to the merging thread's source).
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self._lock = threading.Lock()
+        # (source, stage) -> [seconds, calls, items]
+        self._data: Dict[Tuple[str, str], list] = {}
+
+    @contextmanager
+    def timer(self, stage: str, items: int = 0) -> Iterator[_Timing]:
+        t = _Timing(items)
+        if not self.enabled:
+            yield t
+            return
+        entry = [0.0, _enclosing.get()]
+        token = _enclosing.set(entry)
+        start = time.perf_counter()
+        try:
+            yield t
+        finally:
+            seconds = time.perf_counter() - start
+            _enclosing.reset(token)
+            self._add(_current_source.get(), stage, max(0.0, seconds - entry[0]), 1, t.items)
+            if stage in EXCLUSIVE_STAGES:
+                self._exclude(seconds)
+
+    def count(self, stage: str, items: int = 1) -> None:
+        if self.enabled:
+            self._add(_current_source.get(), stage, 0.0, 0, items)
+
+    def record(self, stage: str, seconds: float, items: int = 0) -> None:
+        """Add one call of `seconds` measured by the caller (e.g. summed sleeps)."""
+        if self.enabled:
+            self._add(_current_source.get(), stage, seconds, 1, items)
+            if stage in EXCLUSIVE_STAGES:
+                self._exclude(seconds)
+
+    @staticmethod
+    def _exclude(seconds: float) -> None:
+        entry = _enclosing.get()
+        while entry is not None:
+            entry[0] += seconds
+            entry = entry[1]
+
+    def _add(self, source: str, stage: str, seconds: float, calls: int, items: int) -> None:
+        with self._lock:
+            entry = self._data.setdefault((source, stage), [0.0, 0, 0])
+            entry[0] += seconds
+            entry[1] += calls
+            entry[2] += items
+
+    def reset(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """{source: {stage: {"seconds", "calls", "items"}}}, JSON-serializable."""
+        out: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        with self._lock:
+            for (source, stage), (seconds, calls, items) in self._data.items():
+                out.setdefault(source, {})[stage] = {
+                    "seconds": round(seconds, 6), "calls": calls, "items": items,
+                }
+        return out
+
+    def merge(self, snapshot: Dict[str, Dict[str, Dict[str, Any]]]) -> None:
+        """Add a snapshot (e.g. from a worker process) into these stats."""
+        current = _current_source.get()
+        for source, stages in snapshot.items():
+            for stage, v in stages.items():
+                self._add(source or current, stage, v["seconds"], v["calls"], v["items"])
+
+    def table(self) -> str:
+        """Human-readable summary, one row per source and stage."""
+        snap = self.snapshot()
+        order = {s: i for i, s in enumerate(STAGES)}
+        lines = [f"{'source':<10} {'stage':<14} {'calls':>7} {'items':>9} {'seconds':>9}"]
+        for source in sorted(snap):
+            stages = snap[source]
+            for stage in sorted(stages, key=lambda s: (order.get(s, len(order)), s)):
+                v = stages[stage]
+                lines.append(f"{source or '-':<10} {stage:<14} {v['calls']:>7} {v['items']:>9} {v['seconds']:>9.3f}")
+        return "\n".join(lines)
+
+    def to_json(self, **extra: Any) -> str:
+        return json.dumps(dict(extra, stages=self.snapshot()), indent=2)
+
+
+STATS = Stats()
+
+
+@contextmanager
+def source(name: Optional[str]) -> Iterator[None]:
+    """Credit stats recorded in this block (and work submitted from it) to `name`."""
+    token = _current_source.set(name or "")
+    try:
+        yield
+    finally:
+        _current_source.reset(token)
+
+
+def timer(stage: str, items: int = 0):
+    return STATS.timer(stage, items)
+
+
+def count(stage: str, items: int = 1) -> None:
+    STATS.count(stage, items)
+
+
+def record(stage: str, seconds: float, items: int = 0) -> None:
+    STATS.record(stage, seconds, items)
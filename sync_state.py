@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict, Optional, Union
+import json
+import os
+import sys
+import threading
+
+
+class SyncState:
+    """
+    Persistent Gmail sync checkpoints: the last historyId seen per source,
+    stored as a small JSON file, e.g. {"schwab": {"history_id": "123456"}}.
+    """
+
+    def __init__(self, path: Union[Path, str]):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._data: Dict[str, Dict[str, str]] = {}
+        if self.path.exists():
+            try:
+                self._data = json.loads(self.path.read_text(encoding="utf-8")) or {}
+            except (OSError, ValueError) as e:
+                print(f"Warning: ignoring unreadable sync state {self.path}: {e}", file=sys.stderr)
+
+    def get_history_id(self, source: str) -> Optional[str]:
+        with self._lock:
+            return (self._data.get(source) or {}).get("history_id")
+
+    def set_history_id(self, source: str, history_id: str) -> None:
+        """Record the checkpoint for `source` and rewrite the file atomically."""
+        with self._lock:
+            self._data.setdefault(source, {})["history_id"] = str(history_id)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            tmp.write_text(json.dumps(self._data, indent=2), encoding="utf-8")
+            os.replace(tmp, self.path)
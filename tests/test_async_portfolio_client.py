@@ -0,0 +1,118 @@
+from pathlib import Path
+import sys
+import unittest
+
+import aiohttp
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from async_portfolio_client import AsyncPortfolioClient  # noqa: E402
+from portfolio_client import PortfolioNotFoundError  # noqa: E402
+from standin_server import StandinServer  # noqa: E402
+
+
+def trades(n, symbol="AAPL"):
+    return [{"symbol": symbol, "shares": i + 1, "price": 10.0, "date": "2025/01/03"} for i in range(n)]
+
+
+class AsyncPortfolioClientTest(unittest.IsolatedAsyncioTestCase):
+    """AsyncPortfolioClient against benchmarks/standin_server.py on localhost."""
+
+    def serve(self, **kwargs) -> StandinServer:
+        server = StandinServer(**kwargs).__enter__()
+        self.addCleanup(server.__exit__, None, None, None)
+        return server
+
+    def client(self, server: StandinServer, **kwargs) -> AsyncPortfolioClient:
+        kwargs.setdefault("backoff_factor", 0.01)
+        return AsyncPortfolioClient(server.base_url, **kwargs)
+
+    async def test_resolve_creates_portfolio_once(self):
+        server = self.serve()
+        async with self.client(server) as client:
+            pid = await client.resolve_portfolio_id("Schwab")
+            self.assertEqual(await client.resolve_portfolio_id("Schwab"), pid)
+        self.assertEqual(server.portfolios, [{"id": pid, "name": "Schwab"}])
+
+    async def test_chunked_upload(self):
+        server = self.serve(accept=("list",))
+        records = trades(7)
+        async with self.client(server, chunk_size=3) as client:
+            pid = await client.resolve_portfolio_id("P")
+            result = await client.upsert_transactions(pid, records)
+        self.assertEqual(result["mode"], "chunked")
+        self.assertEqual(result["shape"], "list")
+        self.assertEqual(result["chunks"], 3)
+        self.assertEqual((result["succeeded"], result["failed"]), (7, 0))
+        self.assertEqual(sorted(t["shares"] for t in server.transactions[pid]), [1, 2, 3, 4, 5, 6, 7])
+
+    async def test_chunked_upload_isolates_rejected_record(self):
+        server = self.serve(reject_symbols={"BAD"})
+        records = trades(5)
+        records[3]["symbol"] = "BAD"
+        async with self.client(server, chunk_size=2) as client:
+            pid = await client.resolve_portfolio_id("P")
+            result = await client.upsert_transactions(pid, records)
+        self.assertEqual(result["failed_indices"], [3])
+        self.assertEqual(len(server.transactions[pid]), 4)
+
+    async def test_unknown_portfolio_raises_not_found(self):
+        server = self.serve()
+        async with self.client(server) as client:
+            with self.assertRaises(PortfolioNotFoundError):
+                await client.upsert_transactions("999", trades(2))
+
+    async def test_get_retried_on_5xx(self):
+        server = self.serve(fail_first=2)
+        async with self.client(server) as client:
+            self.assertEqual(await client.list_portfolios(), [])
+        self.assertEqual(server.requests, 3)
+
+    async def test_upsert_retried_on_5xx_when_enabled(self):
+        server = self.serve()
+        async with self.client(server, retry_upserts=True) as client:
+            pid = await client.resolve_portfolio_id("P")
+            server.fail_first, server.failed = 1, 0
+            self.assertEqual(await client.upsert_transactions(pid, trades(2)), {"upserted": 2})
+            self.assertEqual(client.shape_cache.get(client.base), "wrapped")
+        self.assertEqual(len(server.transactions[pid]), 2)
+
+    async def test_5xx_fails_upload_without_learning_a_shape(self):
+        server = self.serve()
+        async with self.client(server) as client:
+            pid = await client.resolve_portfolio_id("P")
+            server.fail_first, server.failed = 1, 0
+            result = await client.upsert_transactions(pid, trades(2))
+            self.assertEqual(result["mode"], "unavailable")
+            self.assertEqual(result["failed_indices"], [0, 1])
+            self.assertIsNone(client.shape_cache.get(client.base))
+        self.assertNotIn(pid, server.transactions)
+
+    async def test_rejected_record_keeps_bulk_shape(self):
+        server = self.serve(reject_symbols={"BAD"})
+        records = trades(20)
+        records[7]["symbol"] = "BAD"
+        async with self.client(server) as client:
+            pid = await client.resolve_portfolio_id("P")
+            await client.upsert_transactions(pid, trades(20))
+            result = await client.upsert_transactions(pid, records)
+            self.assertEqual(result["failed_indices"], [7])
+            self.assertEqual(client.shape_cache.get(client.base), "wrapped")
+            before = server.requests
+            await client.upsert_transactions(pid, trades(20, "MSFT"))
+            self.assertEqual(server.requests - before, 1)
+
+    async def test_create_portfolio_not_retried_on_5xx(self):
+        server = self.serve()
+        async with self.client(server) as client:
+            await client.list_portfolios()
+            server.fail_first, server.failed = 1, 0
+            with self.assertRaises(aiohttp.ClientResponseError):
+                await client.create_portfolio("P")
+        self.assertEqual(server.portfolios, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+from pathlib import Path
+import sys
+import tempfile
+import unittest
+
+import requests
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from main import push_records_stream  # noqa: E402
+from portfolio_client import PortfolioClient  # noqa: E402
+from push_ledger import PushLedger  # noqa: E402
+from standin_server import StandinServer  # noqa: E402
+
+
+def trades(n, symbol="AAPL"):
+    return [{"symbol": symbol, "shares": i + 1, "price": 10.0, "date": "2025/01/03"} for i in range(n)]
+
+
+class StreamUploadTest(unittest.TestCase):
+    """PortfolioClient.upsert_transactions_stream against benchmarks/standin_server.py."""
+
+    def setUp(self):
+        self.server = StandinServer().__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        self.client = PortfolioClient(self.server.base_url, backoff_factor=0.01)
+        self.addCleanup(self.client.close)
+        self.pid = self.client.resolve_portfolio_id("P")
+
+    def test_generator_is_streamed(self):
+        result = self.client.upsert_transactions_stream(self.pid, (t for t in trades(50)))
+        self.assertEqual(result, {"upserted": 50})
+        self.assertEqual(len(self.server.transactions[self.pid]), 50)
+
+    def test_5xx_raises_without_replaying_the_body(self):
+        self.server.fail_first, self.server.failed = 1, 0
+        requests_before = self.server.requests
+        with self.assertRaises(requests.HTTPError):
+            self.client.upsert_transactions_stream(self.pid, (t for t in trades(5)))
+        self.assertEqual(self.server.requests - requests_before, 1)
+        self.assertNotIn(self.pid, self.server.transactions)
+
+    def test_failed_stream_is_not_acknowledged_in_ledger(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            ledger = PushLedger(Path(tmp) / "ledger.sqlite")
+            self.server.fail_first, self.server.failed = 1, 0
+            with self.assertRaises(requests.HTTPError):
+                push_records_stream(self.client, "P", iter(trades(3)), ledger)
+            self.assertEqual(len(ledger.filter_new(self.client.base, trades(3))), 3)
+
+            push_records_stream(self.client, "P", iter(trades(3)), ledger)
+            self.assertEqual(ledger.filter_new(self.client.base, trades(3)), [])
+            ledger.close()
+
+
+class UploadShapeTest(unittest.TestCase):
+    """What upsert_transactions learns about the payload shape, and from what."""
+
+    def setUp(self):
+        self.server = StandinServer(reject_symbols={"BAD"}).__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        self.client = PortfolioClient(self.server.base_url, backoff_factor=0.01)
+        self.addCleanup(self.client.close)
+        self.pid = self.client.resolve_portfolio_id("P")
+
+    def test_rejected_record_keeps_bulk_shape(self):
+        self.client.upsert_transactions(self.pid, trades(20))
+        records = trades(20)
+        records[7]["symbol"] = "BAD"
+        result = self.client.upsert_transactions(self.pid, records)
+        self.assertEqual(result["failed_indices"], [7])
+        self.assertEqual(len(self.server.transactions[self.pid]), 39)
+        self.assertEqual(self.client.shape_cache.get(self.client.base), "wrapped")
+
+        before = self.server.requests
+        self.client.upsert_transactions(self.pid, trades(20, "MSFT"))
+        self.assertEqual(self.server.requests - before, 1)
+
+    def test_5xx_neither_learns_nor_forgets_a_shape(self):
+        self.server.fail_first, self.server.failed = 1, 0
+        result = self.client.upsert_transactions(self.pid, trades(3))
+        self.assertEqual((result["mode"], result["failed_indices"]), ("unavailable", [0, 1, 2]))
+        self.assertIsNone(self.client.shape_cache.get(self.client.base))
+
+        self.client.upsert_transactions(self.pid, trades(3))
+        self.assertEqual(self.client.shape_cache.get(self.client.base), "wrapped")
+        self.server.fail_first, self.server.failed = 1, 0
+        self.assertEqual(self.client.upsert_transactions(self.pid, trades(3))["mode"], "unavailable")
+        self.assertEqual(self.client.shape_cache.get(self.client.base), "wrapped")
+
+    def test_transient_chunk_failure_is_not_bisected(self):
+        self.client.upsert_transactions(self.pid, trades(2))
+        self.client.chunk_size, self.client.max_in_flight = 10, 1
+        self.server.fail_first, self.server.failed = 1, 0
+        before = self.server.requests
+        result = self.client.upsert_transactions(self.pid, trades(30, "MSFT"))
+        self.assertEqual(self.server.requests - before, 3)
+        self.assertEqual(result["failed_indices"], list(range(10)))
+        self.assertEqual(self.client.shape_cache.get(self.client.base), "wrapped")
+
+
+class RetryPolicyTest(unittest.TestCase):
+    def test_create_portfolio_not_retried(self):
+        with StandinServer(fail_first=1) as server:
+            client = PortfolioClient(server.base_url, backoff_factor=0.01)
+            with self.assertRaises(requests.HTTPError):
+                client.create_portfolio("P")
+            self.assertEqual(server.portfolios, [])
+            client.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,57 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from pathlib import Path
+from typing import Iterable, Iterator, List, Dict, Any, Optional, Union
+import sys
 
 
 class TradeParser(ABC):
+    # Incremental Gmail sync; parsers given a SyncState set these in __init__.
+    sync_state = None
+    sync_key: str = ""
+    _pending_history_id: Optional[str] = None
+    # Set by iter_parse when a message couldn't be fetched or parsed; the
+    # checkpoint then stays put so the next run lists those messages again.
+    _incomplete: bool = False
+
     @abstractmethod
+    def iter_parse(self) -> Iterator[Dict[str, Any]]:
+        """Yield trades as JSON-serializable dicts as each message/statement is parsed."""
+        raise NotImplementedError
+
     def parse(self) -> List[Dict[str, Any]]:
         """Parse trades into a list of JSON-serializable dicts."""
+        return list(self.iter_parse())
+
+    # --- Offline parsing of saved files (no Gmail access) ---
+    @abstractmethod
+    def iter_parse_files(self, paths: Iterable[Union[Path, str]]) -> Iterator[Dict[str, Any]]:
+        """Like iter_parse, but over already-saved files instead of Gmail."""
+        raise NotImplementedError
+
+    def parse_files(self, paths: Iterable[Union[Path, str]]) -> List[Dict[str, Any]]:
+        return list(self.iter_parse_files(paths))
+
+    @abstractmethod
+    def find_files(self, directory: Union[Path, str]) -> List[Path]:
+        """The files under `directory` this parser reads, in path order."""
         raise NotImplementedError
+
+    def iter_parse_directory(self, directory: Union[Path, str]) -> Iterator[Dict[str, Any]]:
+        return self.iter_parse_files(self.find_files(directory))
+
+    def parse_directory(self, directory: Union[Path, str]) -> List[Dict[str, Any]]:
+        return list(self.iter_parse_directory(directory))
+
+    def commit_sync(self) -> None:
+        """
+        Persist the Gmail history checkpoint of the last parse(). Call it once
+        the parsed records are safely handled so a failed push is retried.
+        Does nothing if the last parse() skipped a message or statement.
+        """
+        if self._incomplete and self._pending_history_id:
+            print(f"Warning: {self.sync_key}: some messages failed; keeping the previous history checkpoint.",
+                  file=sys.stderr)
+            self._pending_history_id = None
+        if self.sync_state is not None and self._pending_history_id:
+            self.sync_state.set_history_id(self.sync_key, self._pending_history_id)
+            self._pending_history_id = None